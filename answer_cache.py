@@ -0,0 +1,180 @@
+"""
+Semantic answer cache
+Shares LLM answers across sessions, matching near-duplicate questions with MinHash LSH
+"""
+
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from intent_matcher import NEGATED_CONTRACTIONS, NEGATION_WORDS, STOP_WORDS, negations, stem, words
+
+# Words that make a question lean on earlier turns ("tell me more about that")
+REFERENCE_WORDS = {
+    "it", "its", "that", "this", "those", "these", "there", "here", "then", "so",
+    "they", "them", "their", "he", "she", "him", "his", "her", "more",
+    "elaborate", "expand", "again", "else", "previous", "earlier", "above",
+    "mentioned", "said", "another",
+}
+
+# Interrogatives are stop words for intent matching, but "why" and "when"
+# ask different questions, so they stay in the cache key; so do negations
+QUESTION_WORDS = {"what", "which", "who", "whom", "whose", "how", "why", "where", "when"}
+
+# Modulus for the MinHash permutations (a Mersenne prime above 2**64)
+MERSENNE_PRIME = (1 << 89) - 1
+
+
+def is_standalone(question):
+    """True if a question can be answered without the conversation so far.
+
+    Questions pointing back at earlier turns, and bare follow-ups without
+    any content word ("why?", "how so?"), depend on the conversation.
+    """
+    question_words = words(question)
+    if REFERENCE_WORDS.intersection(question_words):
+        return False
+    return any(word not in STOP_WORDS for word in question_words)
+
+
+def normalize_question(question):
+    """Canonical form of a question: its interrogatives and negations, then its distinct content words, sorted.
+
+    Empty when the question has no content words.
+    """
+    question_words = words(question)
+    content = sorted({
+        stem(word) for word in question_words
+        if word not in STOP_WORDS and word not in NEGATION_WORDS and word not in NEGATED_CONTRACTIONS
+    })
+    if not content:
+        return ""
+    asks = sorted({word for word in question_words if word in QUESTION_WORDS} | negations(question_words))
+    return f"{' '.join(asks)}|{' '.join(content)}"
+
+
+def asks(key):
+    """Interrogative and negation part of a normalized question"""
+    return key.split("|", 1)[0]
+
+
+def shingles(normalized, size=3):
+    """Character n-grams of a normalized question"""
+    padded = f" {normalized} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class AnswerCache:
+    """LLM answers keyed by normalized question, with near-duplicate lookup.
+
+    Candidates come from MinHash signatures split into LSH bands, and are
+    confirmed with the exact Jaccard similarity of their character shingles.
+    Entries expire after ttl seconds and the least recently used ones are
+    evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600, threshold=0.7, num_perm=64, bands=16):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = random.Random(0)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+        # normalized question -> entry, least recently used first
+        self._entries = OrderedDict()
+        # (band, band signature) -> normalized questions
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, question_shingles):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in question_shingles
+        ]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._permutations]
+
+    def _bands(self, signature):
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def get(self, question):
+        """Return the cached entry for a question or a near-duplicate of it, or None"""
+        key = normalize_question(question)
+        if not key:
+            return None
+
+        question_shingles = shingles(key)
+        bands = self._bands(self._signature(question_shingles))
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None:
+                candidates = set()
+                for band in bands:
+                    candidates.update(self._buckets.get(band, ()))
+
+                best_score = self.threshold
+                for candidate in candidates:
+                    # Near-duplicates must still ask the same thing: "why" is not "when", "is" is not "isn't"
+                    if asks(candidate) != asks(key):
+                        continue
+                    score = jaccard(question_shingles, self._entries[candidate]['shingles'])
+                    if score >= best_score:
+                        entry, best_score = self._entries[candidate], score
+
+            if entry is None:
+                return None
+            if entry['expires'] <= now:
+                self._remove(entry['key'])
+                return None
+
+            self._entries.move_to_end(entry['key'])
+            return entry
+
+    def put(self, question, answer, audio_key=None):
+        """Cache an answer, optionally with the TTS cache key of its audio"""
+        key = normalize_question(question)
+        if not key:
+            return
+
+        question_shingles = shingles(key)
+        signature = self._signature(question_shingles)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = {
+                'key': key,
+                'question': question,
+                'answer': answer,
+                'audio_key': audio_key,
+                'shingles': question_shingles,
+                'bands': self._bands(signature),
+                'expires': time.monotonic() + self.ttl,
+            }
+            for band in self._entries[key]['bands']:
+                self._buckets.setdefault(band, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for band in entry['bands']:
+            bucket = self._buckets.get(band)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
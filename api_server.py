@@ -0,0 +1,324 @@
+"""
+Voice pipeline API
+Asyncio HTTP and WebSocket service around VoicePipeline, independent of Streamlit reruns
+
+    GROQ_API_KEY=... python api_server.py --port 8080
+
+POST /v1/turn
+    JSON {"session_id": optional, "text": "..."} or a WAV body with
+    Content-Type audio/wav (session_id in the query string). Returns
+    {"session_id", "transcript", "response", "audio"} with base64 MP3 audio.
+
+GET /v1/ws
+    WebSocket. Send {"type": "text", "text": "..."} or a binary WAV frame per
+    turn. The server answers with JSON events ("session", "transcript",
+    "token", "audio", "done", "error"); every "audio" event is followed by
+    one binary frame holding that MP3 segment.
+
+GET /v1/stream
+    WebSocket for live microphone input. Send binary frames of 16 kHz,
+    16-bit little-endian mono PCM as they are captured. Voice activity
+    detection ends each utterance; the server sends "partial" transcripts
+    while the user speaks, then the final "transcript" and the /v1/ws events
+    of the answer. Audio sent during an answer is transcribed after it.
+
+GET /metrics
+    Per-stage latency histograms, payload sizes, cache outcomes and error
+    counts in the Prometheus text format.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import WSMsgType, web
+
+from claude_responses import SYSTEM_PROMPT
+from context_builder import ContextBuilder
+from voice_pipeline import STT_ERROR_PREFIXES, create_pipeline
+
+# Conversations kept in memory before the least recently used one is dropped
+MAX_CONVERSATIONS = 10000
+
+PIPELINE_KEY = web.AppKey("pipeline")
+CONVERSATIONS_KEY = web.AppKey("conversations")
+EXECUTOR_KEY = web.AppKey("executor")
+
+
+class Conversation:
+    """History and context of one client conversation"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.history = []
+        self.context = ContextBuilder(SYSTEM_PROMPT)
+        # One turn at a time per conversation
+        self.lock = asyncio.Lock()
+
+
+class ConversationStore:
+    """In-memory conversations, least recently used dropped first"""
+
+    def __init__(self, max_conversations=MAX_CONVERSATIONS):
+        self.max_conversations = max_conversations
+        self._conversations = OrderedDict()
+
+    def get(self, session_id=None):
+        """Return the conversation for a session ID, creating it if needed"""
+        session_id = session_id or uuid.uuid4().hex
+        conversation = self._conversations.get(session_id)
+        if conversation is None:
+            conversation = self._conversations[session_id] = Conversation(session_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        self._conversations.move_to_end(session_id)
+        return conversation
+
+
+def parse_question(raw):
+    """Session ID and question text of a JSON message; raises ValueError when it is malformed"""
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise ValueError("Send a JSON object with 'text'")
+    if not isinstance(body, dict):
+        raise ValueError("Send a JSON object with 'text'")
+
+    session_id, text = body.get("session_id"), body.get("text")
+    if session_id is not None and not isinstance(session_id, str):
+        raise ValueError("'session_id' must be a string")
+    if text is not None and not isinstance(text, str):
+        raise ValueError("'text' must be a string")
+    return session_id, text
+
+
+def run_turn(pipeline, conversation, text=None, audio_bytes=None, emit=None):
+    """Run one STT -> LLM -> TTS turn in a worker thread.
+
+    emit(event, payload) receives "transcript", "token" and "audio" events
+    as they happen. Returns the turn result, or raises ValueError when the
+    recording could not be transcribed.
+    """
+    emit = emit or (lambda event, payload: None)
+
+    if audio_bytes:
+        text = pipeline.speech_to_text(audio_bytes)
+        if text.startswith(STT_ERROR_PREFIXES):
+            raise ValueError(text)
+        emit("transcript", text)
+
+    sent = 0
+
+    def _on_text(partial):
+        nonlocal sent
+        emit("token", partial[sent:])
+        sent = len(partial)
+
+    response, audio, error = pipeline.respond(
+        text,
+        conversation.history,
+        conversation.context,
+        on_text=_on_text,
+        on_audio=lambda index, segment: emit("audio", (index, segment))
+    )
+
+    conversation.history.append({'role': 'user', 'message': text})
+    conversation.history.append({'role': 'assistant', 'message': response})
+
+    return {
+        "session_id": conversation.session_id,
+        "transcript": text,
+        "response": response,
+        "audio": audio,
+        "audio_error": str(error) if error else None,
+    }
+
+
+async def handle_turn(request):
+    """Single request/response turn"""
+    if request.content_type.startswith("audio/"):
+        session_id = request.query.get("session_id")
+        text, audio_bytes = None, await request.read()
+    else:
+        try:
+            session_id, text = parse_question(await request.text())
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        audio_bytes = None
+
+    if not text and not audio_bytes:
+        raise web.HTTPBadRequest(text="Send a JSON body with 'text' or an audio/wav body")
+
+    conversation = request.app[CONVERSATIONS_KEY].get(session_id)
+    loop = asyncio.get_running_loop()
+    async with conversation.lock:
+        try:
+            result = await loop.run_in_executor(
+                request.app[EXECUTOR_KEY], run_turn,
+                request.app[PIPELINE_KEY], conversation, text, audio_bytes
+            )
+        except ValueError as e:
+            return web.json_response({"session_id": conversation.session_id, "error": str(e)}, status=422)
+
+    if result["audio"]:
+        result["audio"] = base64.b64encode(result["audio"]).decode("ascii")
+    return web.json_response(result)
+
+
+async def stream_turn(ws, request, conversation, text=None, audio_bytes=None):
+    """Run one turn and stream its events over a WebSocket"""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def _emit(event, payload):
+        loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+
+    async with conversation.lock:
+        turn = loop.run_in_executor(
+            request.app[EXECUTOR_KEY], run_turn,
+            request.app[PIPELINE_KEY], conversation, text, audio_bytes, _emit
+        )
+        turn.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+        while (event := await events.get()) is not None:
+            name, payload = event
+            if name == "audio":
+                index, segment = payload
+                await ws.send_json({"type": "audio", "index": index, "format": "audio/mpeg"})
+                await ws.send_bytes(segment)
+            else:
+                await ws.send_json({"type": name, "text": payload})
+
+        try:
+            result = await turn
+        except ValueError as e:
+            await ws.send_json({"type": "error", "message": str(e)})
+            return
+
+    await ws.send_json({
+        "type": "done",
+        "response": result["response"],
+        "audio_error": result["audio_error"],
+    })
+
+
+async def handle_websocket(request):
+    """Streaming turns over one WebSocket"""
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+
+    conversation = request.app[CONVERSATIONS_KEY].get(request.query.get("session_id"))
+    await ws.send_json({"type": "session", "session_id": conversation.session_id})
+
+    async for message in ws:
+        if message.type == WSMsgType.BINARY:
+            text, audio_bytes = None, message.data
+        elif message.type == WSMsgType.TEXT:
+            try:
+                _, text = parse_question(message.data)
+            except ValueError as e:
+                await ws.send_json({"type": "error", "message": str(e)})
+                continue
+            audio_bytes = None
+            if not text:
+                await ws.send_json({"type": "error", "message": "Empty question"})
+                continue
+        else:
+            break
+
+        await stream_turn(ws, request, conversation, text, audio_bytes)
+
+    return ws
+
+
+async def handle_stream(request):
+    """Live microphone audio in, one turn per detected utterance out"""
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+
+    pipeline = request.app[PIPELINE_KEY]
+    conversation = request.app[CONVERSATIONS_KEY].get(request.query.get("session_id"))
+    await ws.send_json({"type": "session", "session_id": conversation.session_id})
+
+    loop = asyncio.get_running_loop()
+    partials = asyncio.Queue()
+    transcriber = pipeline.stream_transcriber(
+        on_partial=lambda text: loop.call_soon_threadsafe(partials.put_nowait, text)
+    )
+
+    try:
+        async for message in ws:
+            if message.type != WSMsgType.BINARY:
+                break
+
+            # Frames are fed in order; recognition of closed phrases runs in the background
+            transcript = await loop.run_in_executor(
+                request.app[EXECUTOR_KEY], pipeline.feed_stream, transcriber, message.data
+            )
+
+            if transcript is None:
+                while not partials.empty():
+                    await ws.send_json({"type": "partial", "text": partials.get_nowait()})
+                continue
+
+            # Partials still queued are older than the final transcript
+            while not partials.empty():
+                partials.get_nowait()
+
+            if transcript.startswith(STT_ERROR_PREFIXES):
+                await ws.send_json({"type": "error", "message": transcript})
+                continue
+
+            await ws.send_json({"type": "transcript", "text": transcript})
+            await stream_turn(ws, request, conversation, text=transcript)
+    finally:
+        transcriber.close()
+
+    return ws
+
+
+async def handle_metrics(request):
+    """Stage latency histograms and counters in Prometheus text format"""
+    return web.Response(text=request.app[PIPELINE_KEY].tracer.prometheus_text(), content_type="text/plain")
+
+
+def create_app(pipeline, workers=32):
+    """Build the aiohttp application around a pipeline"""
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app[PIPELINE_KEY] = pipeline
+    app[CONVERSATIONS_KEY] = ConversationStore()
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn")
+
+    async def _shutdown(app):
+        app[EXECUTOR_KEY].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(_shutdown)
+    app.router.add_post("/v1/turn", handle_turn)
+    app.router.add_get("/v1/ws", handle_websocket)
+    app.router.add_get("/v1/stream", handle_stream)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the voice pipeline over HTTP and WebSocket")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=32, help="turns processed concurrently")
+    args = parser.parse_args()
+
+    pipeline = create_pipeline(
+        groq_api_key=os.environ.get("GROQ_API_KEY"),
+        stt_backend=os.environ.get("STT_BACKEND", "google"),
+        vosk_model_path=os.environ.get("VOSK_MODEL_PATH", "model")
+    )
+    web.run_app(create_app(pipeline, workers=args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
 import streamlit as st
-from groq import Groq
-from audio_recorder_streamlit import audio_recorder
-import speech_recognition as sr
 import os
 import tempfile
-import asyncio
-import edge_tts
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from claude_responses import SYSTEM_PROMPT
+from audio_encoding import audio_mime, encode_speech, normalize_recording, recording_digest, speech_duration
+from audio_store import AudioStore
+from context_builder import ContextBuilder
+from session_store import CLEARED_ROLE, create_session_store
+from voice_pipeline import create_pipeline
 
 # Page configuration
 st.set_page_config(
@@ -77,142 +80,294 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state# Initialize session state
+if 'session_id' not in st.session_state:
+    # Keep the session ID in the URL so a reconnect to any worker resumes the conversation
+    st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+    st.query_params["session"] = st.session_state.session_id
+
 if 'chat_history' not in st.session_state:
+    # Filled from the session store; history_seq is the last record loaded
     st.session_state.chat_history = []
+    st.session_state.history_seq = 0
 
-if 'groq_client' not in st.session_state:
-    # Get API key from Streamlit secrets (preferred) or environment
-    api_key = st.secrets.get("GROQ_API_KEY")
-    if api_key:
-        try:
-            st.session_state.groq_client = Groq(api_key=api_key)
-        except Exception as e:
-            st.error(f"Error initializing Groq client: {e}")
-            st.session_state.groq_client = None
-    else:
-        st.session_state.groq_client = None
+# Token budgets for recent history and for the summary of older turns
+CONTEXT_TOKEN_BUDGET = 1500
+SUMMARY_TOKEN_BUDGET = 300
+
+
+def new_context():
+    """Create the context builder for a fresh conversation"""
+    return ContextBuilder(SYSTEM_PROMPT, token_budget=CONTEXT_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET)
+
+
+if 'context' not in st.session_state:
+    st.session_state.context = new_context()
 
-if 'last_audio' not in st.session_state:
-    st.session_state.last_audio = None
+if 'history_pages' not in st.session_state:
+    st.session_state.history_pages = 1
+
+if 'last_recording' not in st.session_state:
+    # Digest of the last processed recording, not the recording itself
+    st.session_state.last_recording = None
 if 'conversation_count' not in st.session_state:
     st.session_state.conversation_count = 0
 
 
+# Speech recognition backend: "google" (online), "vosk" or "sphinx" (offline)
+STT_BACKEND = st.secrets.get("STT_BACKEND", "google")
+VOSK_MODEL_PATH = st.secrets.get("VOSK_MODEL_PATH", "model")
+
+# Whether to pre-synthesize SAMPLE_RESPONSES into the TTS cache on startup
+PREWARM_TTS_CACHE = True
+
+# Seconds of silence after which the recorder ends an utterance, and its sample rate
+VOICE_PAUSE_THRESHOLD = 0.8
+VOICE_SAMPLE_RATE = 16000
+
+# Encoding of stored response audio, one of audio_encoding.SPEECH_FORMATS
+# ("mp3" keeps edge-tts output; others are transcoded in the background with
+# ffmpeg, replacing the MP3 once ready, and keep it without ffmpeg)
+TTS_OUTPUT_FORMAT = st.secrets.get("TTS_OUTPUT_FORMAT", "mp3")
+
+# Where conversations are persisted so any app process can serve them:
+# sqlite:///path/to.db (WAL, one node) or file:///shared/dir (one JSONL file per session)
+SESSION_STORE_URL = st.secrets.get(
+    "SESSION_STORE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ashit_voice_bot_sessions.db')}"
+)
+
+# Directory shared by all processes for response audio (default: private temp directory)
+AUDIO_STORE_DIR = st.secrets.get("AUDIO_STORE_DIR")
+
+# File the per-stage metrics are written to as JSON every METRICS_DUMP_INTERVAL seconds (off when unset)
+METRICS_DUMP_PATH = st.secrets.get("METRICS_DUMP_PATH")
+METRICS_DUMP_INTERVAL = 60
+
+# Show stage timings in the sidebar (also enabled per session with ?debug=1)
+DEBUG_PANEL = st.secrets.get("DEBUG_PANEL", False)
+
+
 # Functions
+@st.cache_resource
+def get_pipeline():
+    """Create the voice pipeline shared by all sessions"""
+    # Get API key from Streamlit secrets
+    pipeline = create_pipeline(
+        groq_api_key=st.secrets.get("GROQ_API_KEY"),
+        stt_backend=STT_BACKEND,
+        vosk_model_path=VOSK_MODEL_PATH,
+        prewarm_tts_cache=PREWARM_TTS_CACHE
+    )
+    if METRICS_DUMP_PATH:
+        pipeline.tracer.start_json_dump(METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL)
+    return pipeline
+
+
 def speech_to_text(audio_bytes):
     """Convert audio bytes to text using speech recognition"""
-    try:
-        recognizer = sr.Recognizer()
-        
-        # Save audio bytes to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_file_path = tmp_file.name
-        
-        # Load audio file
-        with sr.AudioFile(tmp_file_path) as source:
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data)
-        
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
-        
-        return text
-    except sr.UnknownValueError:
-        return "Sorry, I couldn't understand the audio. Please try again."
-    except sr.RequestError as e:
-        return f"Speech recognition error: {e}"
-    except Exception as e:
-        return f"Error processing audio: {e}"
-
-def get_claude_response(user_message):
-    """Get response from Groq API with Ashit's personality"""
-    try:
-        if not st.session_state.groq_client:
-            return "API key not configured. Please add GROQ_API_KEY to Streamlit secrets."
-        
-        # Build conversation history for context
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        
-        # Add recent chat history (last 5 exchanges for context)
-        recent_history = st.session_state.chat_history[-10:] if len(st.session_state.chat_history) > 10 else st.session_state.chat_history
-        for chat in recent_history:
-            messages.append({
-                "role": "user" if chat['role'] == 'user' else "assistant",
-                "content": chat['message']
-            })
-        
-        # Add current message
-        messages.append({"role": "user", "content": user_message})
-        
-        # Call Groq API
-        response = st.session_state.groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500,
-            top_p=0.9
-        )
-        
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error getting response: {e}"
+    return get_pipeline().speech_to_text(audio_bytes)
+
+
+def render_bot_message(placeholder, message):
+    """Render a bot message bubble into a placeholder"""
+    placeholder.markdown(f"""
+        <div class="chat-message bot-message">
+            <strong>Ashit:</strong> {message}
+        </div>
+    """, unsafe_allow_html=True)
+
+
+# Pause left between the first sentence and the rest, covering the browser's playback start
+SPEECH_GAP = 0.25
+
+
+def stream_response_with_speech(user_message):
+    """Stream the response onto the page and start speaking as soon as its first sentence is synthesized.
+
+    Returns the response, its audio and the player to pass to finish_speech().
+    """
+    placeholder = st.empty()
+    player = {'slot': st.empty(), 'first': None, 'started': None}
+
+    def _on_audio(index, segment):
+        if index == 0:
+            # Speak the first sentence while the rest of the answer is still being generated
+            player['slot'].audio(segment, format="audio/mpeg", autoplay=True)
+            player['first'] = segment
+            player['started'] = time.monotonic()
+
+    response, audio_bytes, error = get_pipeline().respond(
+        user_message,
+        st.session_state.chat_history,
+        st.session_state.context,
+        on_text=lambda text: render_bot_message(placeholder, text + " ▌"),
+        on_audio=_on_audio
+    )
+    render_bot_message(placeholder, response)
+
+    if error:
+        st.error(f"Error generating speech: {error}")
+    return response, audio_bytes, player
+
+
+def finish_speech(player, audio_bytes):
+    """Play the rest of the answer after its first sentence, and wait until it has been heard.
+
+    Streamlit cannot queue audio and a rerun removes the player, so the
+    script waits out each part before swapping in the next or rerunning.
+    """
+    if not player['first']:
+        return
+    rest = audio_bytes[len(player['first']):] if audio_bytes else b""
+    time.sleep(max(0.0, player['started'] + speech_duration(player['first']) + SPEECH_GAP - time.monotonic()))
+    if rest:
+        player['slot'].audio(rest, format="audio/mpeg", autoplay=True)
+        time.sleep(speech_duration(rest) + SPEECH_GAP)
+
+
+# Byte limits for spilled response audio, per session and for the whole process
+AUDIO_SESSION_LIMIT = 8 * 1024 * 1024
+AUDIO_GLOBAL_LIMIT = 512 * 1024 * 1024
 
 
-def text_to_speech(text):
-    """Convert text to speech using Microsoft Edge TTS with Indian male voice"""
+@st.cache_resource
+def get_audio_store():
+    """Create the process-wide store that holds response audio outside session state"""
+    return AudioStore(AUDIO_STORE_DIR, session_limit=AUDIO_SESSION_LIMIT, global_limit=AUDIO_GLOBAL_LIMIT)
+
+
+@st.cache_resource
+def get_transcoder():
+    """Single background worker re-encoding stored audio, so transcoding stays off the request path"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcode")
+
+
+def compact_audio(audio_store, blob_id, audio_bytes):
+    """Swap a stored MP3 for its TTS_OUTPUT_FORMAT encoding"""
+    encoded = encode_speech(audio_bytes, TTS_OUTPUT_FORMAT)
+    if encoded is not audio_bytes:
+        audio_store.replace(blob_id, encoded)
+
+
+def store_audio(audio_bytes):
+    """Spill audio to the store and return the ID kept in chat history"""
+    if not audio_bytes:
+        return None
+    audio_store = get_audio_store()
     try:
-        # Use Indian English male voice
-        voice = "en-GB-RyanNeural"
-
-        async def _generate():
-            # Create a temporary file to save the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-                tmp_path = tmp_file.name
-            
-            # Generate speech and save to temp file
-            communicate = edge_tts.Communicate(text, voice=voice)
-            await communicate.save(tmp_path)
-            
-            # Read the audio data
-            with open(tmp_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
-            
-            # Clean up temp file
-            os.unlink(tmp_path)
-            
-            return audio_data
-
-        # Run the async function
-        return asyncio.run(_generate())
-
-    except Exception as e:
-        st.error(f"Error generating speech: {e}")
+        blob_id = audio_store.put(st.session_state.session_id, audio_bytes)
+    except OSError:
+        # Save the turn without its audio rather than lose it
         return None
+    if TTS_OUTPUT_FORMAT != "mp3":
+        get_transcoder().submit(compact_audio, audio_store, blob_id, audio_bytes)
+    return blob_id
 
 
-def display_chat_history():
-    """Display the chat history"""
-    for idx, chat in enumerate(st.session_state.chat_history):
+@st.cache_resource
+def get_session_store():
+    """Open the conversation store shared by every app process"""
+    return create_session_store(SESSION_STORE_URL)
+
+
+def sync_history():
+    """Add entries written since the last sync, by this or any other process"""
+    for record in get_session_store().load(st.session_state.session_id, after=st.session_state.history_seq):
+        if record['role'] == CLEARED_ROLE:
+            # Cleared here or in another tab: drop everything loaded before it
+            st.session_state.chat_history = []
+            st.session_state.context = new_context()
+            st.session_state.history_pages = 1
+        else:
+            st.session_state.chat_history.append(record)
+        st.session_state.history_seq = record['seq']
+
+
+def save_turn(user_message, response, audio_bytes):
+    """Persist a question/answer pair, keeping only a reference to its audio"""
+    get_session_store().append(st.session_state.session_id, [
+        {'role': 'user', 'message': user_message},
+        {'role': 'assistant', 'message': response, 'audio_id': store_audio(audio_bytes)},
+    ])
+    sync_history()
+
+
+# Number of question/answer turns shown per page of chat history
+HISTORY_PAGE_TURNS = 5
+
+
+def message_html(chat):
+    """Return a chat message's HTML, rendering it once per history entry"""
+    if 'html' not in chat:
         if chat['role'] == 'user':
-            st.markdown(f"""
+            chat['html'] = f"""
                 <div class="chat-message user-message">
                     <strong>You:</strong> {chat['message']}
                 </div>
-            """, unsafe_allow_html=True)
+            """
         else:
-            st.markdown(f"""
+            chat['html'] = f"""
                 <div class="chat-message bot-message">
                     <strong>Ashit:</strong> {chat['message']}
                 </div>
-            """, unsafe_allow_html=True)
-            
-            # Add audio playback if available
-            if 'audio' in chat and chat['audio']:
-                st.audio(chat['audio'], format='audio/mp3')
+            """
+    return chat['html']
+
+
+def load_older_messages():
+    """Show one more page of chat history"""
+    st.session_state.history_pages += 1
+
+
+@st.fragment
+def display_chat_history():
+    """Display the most recent pages of the chat history"""
+    history = st.session_state.chat_history
+    shown = 2 * HISTORY_PAGE_TURNS * st.session_state.history_pages
+
+    with get_pipeline().tracer.span("rerender", messages_shown=min(shown, len(history))) as span:
+        # Paging only reruns this fragment, not the whole app
+        if len(history) > shown:
+            st.button(
+                f"⬆️ Load older messages ({len(history) - shown} hidden)",
+                on_click=load_older_messages
+            )
+
+        audio_bytes_out = 0
+        for chat in history[-shown:]:
+            st.markdown(message_html(chat), unsafe_allow_html=True)
+
+            # Add audio playback if available, loading it only for shown turns
+            if chat['role'] != 'user' and chat.get('audio_id'):
+                audio_bytes = get_audio_store().get(chat['audio_id'])
+                if audio_bytes:
+                    audio_bytes_out += len(audio_bytes)
+                    st.audio(audio_bytes, format=audio_mime(audio_bytes))
+        span.set(audio_bytes_out=audio_bytes_out)
+
+
+def render_debug_panel():
+    """Stage latencies and the spans of the latest turn, for spotting regressions"""
+    pipeline = get_pipeline()
+    with st.expander("🛠️ Pipeline timings"):
+        st.caption("Per stage, in seconds (histogram bucket upper bounds)")
+        st.table([{"stage": name, **stats} for name, stats in pipeline.tracer.summary().items()])
+
+        st.caption("Latest turn")
+        st.table([
+            {"span": span.name, "ms": round(span.duration * 1000, 1), "error": span.error or "", **span.attributes}
+            for span in pipeline.tracer.last_trace(root="turn")
+        ])
+
+        if pipeline.model_router:
+            st.caption("Model routing")
+            st.json(pipeline.model_router.stats(), expanded=False)
 
 # Main UI
 def main():
+    # Pick up turns saved by other processes serving this session
+    sync_history()
+
     # Header
     st.markdown('<h1 class="main-header">🤖 Ashit Voice Bot</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Ask me about myself! I\'m Ashit, an AI assistant.</p>', unsafe_allow_html=True)
@@ -223,7 +378,7 @@ def main():
         st.markdown("""
         1. **Click** the microphone button below
         2. **Speak** your question clearly
-        3. **Click** "Process Recording"
+        3. **Pause** - recording stops and is answered automatically
         4. **Listen** to my audio answer
         5. **Repeat** for more questions!
         
@@ -251,10 +406,15 @@ def main():
         
         # Clear chat history button
         if st.button("🗑️ Clear Chat History"):
-            st.session_state.chat_history = []
-            st.session_state.last_audio = None
+            get_audio_store().delete_session(st.session_state.session_id)
+            get_session_store().delete(st.session_state.session_id)
+            sync_history()
+            st.session_state.last_recording = None
             st.session_state.conversation_count = 0
             st.rerun()
+
+        if DEBUG_PANEL or st.query_params.get("debug") == "1":
+            render_debug_panel()
     
     # Main content area
     st.markdown("---")
@@ -286,92 +446,70 @@ def main():
         
         if submit_button and user_input:
             with st.spinner("🤔 Thinking..."):
-                # Get response
-                response = get_claude_response(user_input)
-                
-                with st.spinner("🔊 Generating voice..."):
-                    # Generate speech
-                    audio_bytes = text_to_speech(response)
+                # Stream the response while generating voice sentence by sentence
+                response, audio_bytes, player = stream_response_with_speech(user_input)
                 
                 # Add to chat history
-                st.session_state.chat_history.append({
-                    'role': 'user',
-                    'message': user_input
-                })
-                st.session_state.chat_history.append({
-                    'role': 'assistant',
-                    'message': response,
-                    'audio': audio_bytes
-                })
+                save_turn(user_input, response, audio_bytes)
                 
                 st.session_state.conversation_count += 1
-                st.rerun()
+
+            # Let the answer finish playing before the rerun replaces the page
+            finish_speech(player, audio_bytes)
+            st.rerun()
     else:
         # Voice input mode
         st.subheader("🎤 Speak Your Question")
         
         # Instructions
-        st.info("👇 Click the microphone to record, then click 'Process Recording' to get a response")
+        st.info("👇 Click the microphone and ask your question - it's answered as soon as you stop speaking")
         
-        # Audio recorder
+        # Audio recorder, only loaded once a session uses voice mode
+        from audio_recorder_streamlit import audio_recorder
+
+        # The recorder stops itself after VOICE_PAUSE_THRESHOLD seconds of silence,
+        # recording at the recognizers' sample rate so no resampling is needed
         audio_bytes = audio_recorder(
             text="Click to record",
             recording_color="#e74c3c",
             neutral_color="#667eea",
             icon_name="microphone",
             icon_size="3x",
+            pause_threshold=VOICE_PAUSE_THRESHOLD,
+            sample_rate=VOICE_SAMPLE_RATE,
             key=f"audio_recorder_{st.session_state.conversation_count}"
         )
         
-        # Check if new audio is recorded
-        if audio_bytes:
-            if audio_bytes != st.session_state.last_audio:
-                st.session_state.last_audio = audio_bytes
-                st.success("✅ Recording captured! Click 'Process Recording' below.")
-            st.audio(audio_bytes, format="audio/wav")
-        
-        # Process button - always visible
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            process_clicked = st.button(
-                "🔄 Process Recording", 
-                disabled=not audio_bytes, 
-                use_container_width=True,
-                type="primary"
-            )
-        
-        if process_clicked and audio_bytes:
+        # Process a new recording right away, without waiting for a button press
+        recording_id = recording_digest(audio_bytes) if audio_bytes else None
+        if recording_id and recording_id != st.session_state.last_recording:
+            st.session_state.last_recording = recording_id
+
+            # Downmix and resample once, for both playback and recognition
+            recording = normalize_recording(audio_bytes)
+            st.audio(recording, format="audio/wav")
+
             with st.spinner("🎧 Processing your voice..."):
                 # Convert speech to text
-                user_message = speech_to_text(audio_bytes)
+                user_message = speech_to_text(recording)
                 
                 if user_message and not user_message.startswith("Sorry") and not user_message.startswith("Error"):
                     st.success(f"📝 You said: **{user_message}**")
                     
                     with st.spinner("🤔 Getting Ashit's response..."):
-                        # Get response from Ashit
-                        response = get_claude_response(user_message)
-                        
-                        with st.spinner("🔊 Generating voice..."):
-                            # Convert response to speech
-                            response_audio = text_to_speech(response)
+                        # Stream Ashit's response while generating voice sentence by sentence
+                        response, response_audio, player = stream_response_with_speech(user_message)
                         
                         # Add to chat history
-                        st.session_state.chat_history.append({
-                            'role': 'user',
-                            'message': user_message
-                        })
-                        st.session_state.chat_history.append({
-                            'role': 'assistant',
-                            'message': response,
-                            'audio': response_audio
-                        })
+                        save_turn(user_message, response, response_audio)
                         
-                        # Reset last audio to allow new recording
-                        st.session_state.last_audio = None
+                        # Reset last recording to allow new recording
+                        st.session_state.last_recording = None
                         st.session_state.conversation_count += 1
-                        
-                        st.rerun()
+
+                    # Let the answer finish playing before the rerun replaces the page
+                    finish_speech(player, response_audio)
+                    st.rerun()
                 else:
                     st.error(f"❌ {user_message}")
         
@@ -393,5 +531,9 @@ def main():
         </div>
     """, unsafe_allow_html=True)
 
+    # Create the shared pipeline once the page is rendered, so TTS pre-warming
+    # starts in the background; Groq and speech clients are still built on first use
+    get_pipeline()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
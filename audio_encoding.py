@@ -0,0 +1,88 @@
+"""
+Audio encoding
+Recording digests, 16 kHz mono normalization and compact encodings for response audio
+"""
+
+import hashlib
+import io
+import shutil
+
+# Encodings for response audio. edge-tts always produces 24 kHz 48 kbit/s MP3,
+# so every other format is transcoded with pydub/ffmpeg.
+SPEECH_FORMATS = {
+    # edge-tts output as is
+    "mp3": {},
+    # Plays everywhere, about two thirds of the size
+    "mp3-32k": {"format": "mp3", "bitrate": "32k", "parameters": ["-ar", "22050"]},
+    # Opus in WebM, about half the size of mp3-32k for speech
+    "opus": {"format": "webm", "codec": "libopus", "bitrate": "16k", "parameters": ["-application", "voip"]},
+}
+
+# Bitrate of edge-tts MP3, which is constant, so its duration follows from its size
+SPEECH_BITRATE = 48000
+
+# Leading bytes of each container, to pick the MIME type of stored audio
+MAGIC_NUMBERS = [
+    (b"\x1a\x45\xdf\xa3", "audio/webm"),
+    (b"OggS", "audio/ogg"),
+    (b"RIFF", "audio/wav"),
+]
+
+
+def recording_digest(audio_bytes):
+    """Short fingerprint identifying a recording, so the bytes need not be kept for comparison"""
+    return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+
+def normalize_recording(audio_bytes):
+    """Downmix and resample a WAV recording to 16 kHz 16-bit mono, the format every recognizer uses.
+
+    Returns the recording unchanged if it cannot be decoded, so speech
+    recognition can report the problem.
+    """
+    from speech_recognizers import load_audio
+
+    try:
+        return load_audio(audio_bytes).get_wav_data()
+    except Exception:
+        return audio_bytes
+
+
+def encode_speech(mp3_bytes, speech_format):
+    """Re-encode edge-tts MP3 in one of SPEECH_FORMATS.
+
+    Falls back to the original MP3 when ffmpeg is not installed or
+    transcoding fails, since playable audio beats smaller audio.
+    """
+    options = SPEECH_FORMATS[speech_format]
+    if not mp3_bytes or not options or shutil.which("ffmpeg") is None:
+        return mp3_bytes
+
+    from pydub import AudioSegment
+
+    try:
+        segment = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
+        buffer = io.BytesIO()
+        segment.export(
+            buffer,
+            format=options["format"],
+            codec=options.get("codec"),
+            bitrate=options["bitrate"],
+            parameters=options.get("parameters")
+        )
+        return buffer.getvalue()
+    except Exception:
+        return mp3_bytes
+
+
+def speech_duration(mp3_bytes):
+    """Playing time of edge-tts MP3 in seconds"""
+    return len(mp3_bytes) * 8 / SPEECH_BITRATE
+
+
+def audio_mime(audio_bytes):
+    """MIME type of stored audio, from its container's magic number"""
+    for magic, mime in MAGIC_NUMBERS:
+        if audio_bytes.startswith(magic):
+            return mime
+    return "audio/mpeg"
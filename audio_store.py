@@ -0,0 +1,151 @@
+"""
+Audio blob store
+Keeps conversation audio on disk, addressed by ID, with per-session and global size caps
+"""
+
+import atexit
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+
+class AudioStore:
+    """Spills audio blobs to a directory so session state only holds their IDs.
+
+    Blobs live in one subdirectory per session, so the directory itself is
+    the record of what exists and several processes can share it. When a
+    session or the whole store exceeds its byte limit, the oldest blobs
+    are deleted first; get() returns None for blobs that were evicted.
+    """
+
+    def __init__(self, directory=None, session_limit=8 * 1024 * 1024, global_limit=512 * 1024 * 1024):
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="ashit_voice_bot_audio_")
+            atexit.register(shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.session_limit = session_limit
+        self.global_limit = global_limit
+
+        # blob_id -> (session_key, size), oldest first
+        self._blobs = OrderedDict()
+        self._session_sizes = Counter()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def _session_key(self, session_id):
+        """Directory name for a session; IDs come from the URL, so keep only safe characters"""
+        return re.sub(r"[^A-Za-z0-9_-]", "", session_id) or "_"
+
+    def _path(self, blob_id):
+        session_key, _, name = blob_id.partition("/")
+        return os.path.join(self.directory, self._session_key(session_key), os.path.basename(name))
+
+    def _scan(self):
+        """Rebuild the accounting from the directory, including blobs written by other processes"""
+        blobs = []
+        for session_entry in os.scandir(self.directory):
+            if not session_entry.is_dir():
+                continue
+            try:
+                entries = list(os.scandir(session_entry.path))
+            except FileNotFoundError:
+                # Cleared by another process since the directory was listed
+                continue
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                blobs.append((entry.name, f"{session_entry.name}/{entry.name}", session_entry.name, size))
+
+        # Blob names start with their creation time, so they sort oldest first
+        blobs.sort()
+        self._blobs = OrderedDict((blob_id, (session_key, size)) for _, blob_id, session_key, size in blobs)
+        self._session_sizes = Counter()
+        for session_key, size in self._blobs.values():
+            self._session_sizes[session_key] += size
+        self._total_size = sum(self._session_sizes.values())
+
+    def _write(self, blob_id, audio_data):
+        """Write a blob atomically, so readers never see a partial file"""
+        path = self._path(blob_id)
+        with open(f"{path}.tmp", "wb") as blob_file:
+            blob_file.write(audio_data)
+        os.replace(f"{path}.tmp", path)
+
+    def put(self, session_id, audio_data):
+        """Store audio for a session and return its blob ID"""
+        session_key = self._session_key(session_id)
+        blob_id = f"{session_key}/{time.time_ns():016x}{uuid.uuid4().hex[:16]}"
+        os.makedirs(os.path.join(self.directory, session_key), exist_ok=True)
+        self._write(blob_id, audio_data)
+
+        with self._lock:
+            self._enforce_limits()
+
+        return blob_id
+
+    def replace(self, blob_id, audio_data):
+        """Replace a blob's bytes, e.g. with a smaller encoding; does nothing if it was evicted"""
+        # Sizes are picked up by the next scan
+        with self._lock:
+            if not os.path.exists(self._path(blob_id)):
+                return
+            try:
+                self._write(blob_id, audio_data)
+            except FileNotFoundError:
+                # The session was cleared meanwhile; do not bring its directory back
+                pass
+
+    def get(self, blob_id):
+        """Load a blob's bytes, or None if it does not exist (anymore)"""
+        try:
+            with open(self._path(blob_id), "rb") as blob_file:
+                return blob_file.read()
+        except OSError:
+            return None
+
+    def delete_session(self, session_id):
+        """Delete every blob belonging to a session, whichever process wrote it"""
+        session_key = self._session_key(session_id)
+        with self._lock:
+            shutil.rmtree(os.path.join(self.directory, session_key), ignore_errors=True)
+            for blob_id in [b for b, (s, _) in self._blobs.items() if s == session_key]:
+                self._forget(blob_id)
+
+    def _enforce_limits(self):
+        """Evict the oldest blobs past either limit.
+
+        The directory is rescanned first, since other processes may have
+        written or deleted blobs; one scandir per stored answer is cheap
+        next to producing it.
+        """
+        self._scan()
+        for session_key in [s for s, size in self._session_sizes.items() if size > self.session_limit]:
+            while self._session_sizes[session_key] > self.session_limit:
+                self._remove(next(b for b, (s, _) in self._blobs.items() if s == session_key))
+        while self._total_size > self.global_limit:
+            self._remove(next(iter(self._blobs)))
+
+    def _forget(self, blob_id):
+        session_key, size = self._blobs.pop(blob_id)
+        self._session_sizes[session_key] -= size
+        if self._session_sizes[session_key] <= 0:
+            del self._session_sizes[session_key]
+        self._total_size -= size
+
+    def _remove(self, blob_id):
+        self._forget(blob_id)
+        try:
+            os.unlink(self._path(blob_id))
+        except OSError:
+            pass
@@ -0,0 +1,31 @@
+"""
+Background event loop
+A long-lived asyncio loop in a daemon thread that synchronous code submits coroutines to
+"""
+
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """Runs coroutines on one persistent event loop, at most max_concurrency at a time"""
+
+    def __init__(self, max_concurrency=None, name="background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    async def _limited(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future"""
+        if self._semaphore:
+            coro = self._limited(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and block until it finishes"""
+        return self.submit(coro).result(timeout)
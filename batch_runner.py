@@ -0,0 +1,188 @@
+"""
+Batch answer generation
+Runs a question set through the same prompt and voice as the app and writes answers and audio
+
+    GROQ_API_KEY=... python batch_runner.py --samples --questions custom.jsonl --out practice_set
+
+Questions come from SAMPLE_QUESTIONS (--samples, one per SAMPLE_RESPONSES key)
+and/or a JSONL file of {"id": optional, "question": "..."} lines. Results are
+appended to <out>/results.jsonl with audio in <out>/audio/<id>.mp3; items
+already in results.jsonl are skipped, so an interrupted run can be resumed.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from claude_responses import SAMPLE_QUESTIONS, SYSTEM_PROMPT
+from context_builder import ContextBuilder
+from voice_pipeline import ResponseError, create_pipeline
+
+
+def load_questions(include_samples, questions_path):
+    """Return (id, question) pairs, sample questions first"""
+    items = []
+    if include_samples:
+        items.extend((key, phrases[0]) for key, phrases in SAMPLE_QUESTIONS.items())
+
+    if questions_path:
+        with open(questions_path, encoding="utf-8") as questions_file:
+            for line in questions_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                question = record["question"]
+                item_id = record.get("id") or hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+                items.append((str(item_id), question))
+    return items
+
+
+def completed_ids(results_path):
+    """IDs already written by a previous run, skipping a line cut short when it was killed"""
+    if not os.path.exists(results_path):
+        return set()
+    ids = set()
+    with open(results_path, encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                ids.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return ids
+
+
+def end_partial_line(results_path):
+    """Terminate a line cut short by a killed run, so the next result starts on its own line"""
+    if not os.path.exists(results_path) or not os.path.getsize(results_path):
+        return
+    with open(results_path, "rb+") as results_file:
+        results_file.seek(-1, os.SEEK_END)
+        if results_file.read(1) != b"\n":
+            results_file.write(b"\n")
+
+
+def audio_name(item_id):
+    """File name for an item's audio; IDs come from the questions file, so keep only safe characters"""
+    name = re.sub(r"[^A-Za-z0-9_-]", "", item_id)
+    if name != item_id:
+        # Keep IDs that differ only in dropped characters apart
+        name = f"{name}-{hashlib.sha1(item_id.encode('utf-8')).hexdigest()[:8]}".lstrip("-")
+    return name
+
+
+class BatchRunner:
+    """Answers questions with bounded LLM and TTS concurrency and streams results to disk"""
+
+    def __init__(self, pipeline, out_dir, llm_concurrency=4, tts_concurrency=8):
+        self.pipeline = pipeline
+        self.out_dir = out_dir
+        self.audio_dir = os.path.join(out_dir, "audio")
+        self.results_path = os.path.join(out_dir, "results.jsonl")
+        self.llm_concurrency = llm_concurrency
+        self.tts_concurrency = tts_concurrency
+
+        self.stats = {"completed": 0, "skipped": 0, "failed": 0, "llm_seconds": 0.0, "tts_seconds": 0.0}
+
+    def _answer(self, question):
+        # Every question is answered on its own, without earlier conversation
+        return self.pipeline.get_claude_response(question, [], ContextBuilder(SYSTEM_PROMPT))
+
+    async def _process(self, item_id, question, llm_slots, tts_slots, results_file):
+        async with llm_slots:
+            start = time.perf_counter()
+            try:
+                answer = await asyncio.to_thread(self._answer, question)
+            except ResponseError as e:
+                self.stats["failed"] += 1
+                print(f"[{item_id}] {e}", file=sys.stderr)
+                return
+            finally:
+                self.stats["llm_seconds"] += time.perf_counter() - start
+
+        async with tts_slots:
+            start = time.perf_counter()
+            try:
+                audio = await asyncio.to_thread(self.pipeline.synthesize_speech, answer)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"[{item_id}] Error generating speech: {e}", file=sys.stderr)
+                return
+            finally:
+                self.stats["tts_seconds"] += time.perf_counter() - start
+
+        audio_path = os.path.join(self.audio_dir, f"{audio_name(item_id)}.mp3")
+        with open(audio_path, "wb") as audio_file:
+            audio_file.write(audio)
+
+        # Written last, so an item only counts as done once its audio exists
+        results_file.write(json.dumps({
+            "id": item_id,
+            "question": question,
+            "answer": answer,
+            "audio": os.path.relpath(audio_path, self.out_dir),
+        }) + "\n")
+        results_file.flush()
+        self.stats["completed"] += 1
+
+    async def run(self, items):
+        os.makedirs(self.audio_dir, exist_ok=True)
+        done = completed_ids(self.results_path)
+        end_partial_line(self.results_path)
+        pending = [(item_id, question) for item_id, question in items if item_id not in done]
+        self.stats["skipped"] = len(items) - len(pending)
+
+        # Enough threads for every LLM and TTS slot to block at once
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.llm_concurrency + self.tts_concurrency)
+        )
+        llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        tts_slots = asyncio.Semaphore(self.tts_concurrency)
+
+        with open(self.results_path, "a", encoding="utf-8") as results_file:
+            await asyncio.gather(*(
+                self._process(item_id, question, llm_slots, tts_slots, results_file)
+                for item_id, question in pending
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate answers and audio for a set of questions")
+    parser.add_argument("--samples", action="store_true", help="include one question per SAMPLE_RESPONSES key")
+    parser.add_argument("--questions", help="JSONL file of {\"id\", \"question\"} lines")
+    parser.add_argument("--out", default="batch_output", help="output directory")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--tts-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    items = load_questions(args.samples, args.questions)
+    if not items:
+        parser.error("nothing to do: pass --samples and/or --questions")
+
+    pipeline = create_pipeline(groq_api_key=os.environ.get("GROQ_API_KEY"), prewarm_tts_cache=False)
+    runner = BatchRunner(pipeline, args.out, args.llm_concurrency, args.tts_concurrency)
+
+    start = time.perf_counter()
+    asyncio.run(runner.run(items))
+    elapsed = time.perf_counter() - start
+
+    stats = runner.stats
+    processed = stats["completed"] + stats["failed"]
+    print(
+        f"{stats['completed']} completed, {stats['skipped']} skipped, {stats['failed']} failed "
+        f"in {elapsed:.1f}s ({stats['completed'] / elapsed:.2f} items/s)"
+    )
+    if processed:
+        print(
+            f"avg LLM {stats['llm_seconds'] / processed:.2f}s, "
+            f"avg TTS {stats['tts_seconds'] / max(stats['completed'], 1):.2f}s per item"
+        )
+
+
+if __name__ == "__main__":
+    main()
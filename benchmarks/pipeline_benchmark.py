@@ -0,0 +1,193 @@
+"""
+End-to-end voice pipeline benchmark
+
+Drives the real VoicePipeline (speech_to_text, the streamed Groq response and
+sentence-chunked speech synthesis) against local stand-ins from benchmarks.stubs,
+with N concurrent sessions, and prints per-stage latency percentiles,
+throughput and peak RSS as JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline_benchmark --sessions 8 --turns 5 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from answer_cache import AnswerCache
+from benchmarks.stubs import FakeGroqServer, StubRecognizer, fake_tts, make_fixture_wav
+from claude_responses import SYSTEM_PROMPT
+from context_builder import ContextBuilder
+from groq_pool import SharedGroqClient
+from intent_matcher import IntentMatcher
+from model_router import ModelRouter
+from tts_cache import TTSCache
+from voice_pipeline import VoicePipeline
+
+# Question the stub recognizer "hears"; deliberately not one of SAMPLE_RESPONSES
+DEFAULT_QUESTION = "What did you work on during your internship at Xebia?"
+
+STAGES = ["stt", "llm_first_token", "llm_total", "tts_tail", "end_to_end"]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for one stage"""
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 2) if values else None,
+        "p50_ms": round(1000 * percentile(values, 50), 2) if values else None,
+        "p95_ms": round(1000 * percentile(values, 95), 2) if values else None,
+        "p99_ms": round(1000 * percentile(values, 99), 2) if values else None,
+        "max_ms": round(1000 * values[-1], 2) if values else None,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_session(pipeline, wav_bytes, turns, samples, errors, lock):
+    """One simulated user asking questions back to back"""
+    history = []
+    context = ContextBuilder(SYSTEM_PROMPT)
+
+    for _ in range(turns):
+        marks = {}
+
+        def _on_text(text):
+            now = time.perf_counter()
+            marks.setdefault("first_token", now)
+            marks["last_token"] = now
+
+        start = time.perf_counter()
+        question = pipeline.speech_to_text(wav_bytes)
+        stt_done = time.perf_counter()
+        response, audio, error = pipeline.respond(question, history, context, on_text=_on_text)
+        end = time.perf_counter()
+
+        history.append({'role': 'user', 'message': question})
+        history.append({'role': 'assistant', 'message': response})
+
+        with lock:
+            if error or not audio or response.startswith("Error"):
+                errors.append(str(error) if error else response[:200])
+                continue
+            samples["stt"].append(stt_done - start)
+            samples["llm_first_token"].append(marks["first_token"] - stt_done)
+            samples["llm_total"].append(marks["last_token"] - stt_done)
+            samples["tts_tail"].append(end - marks["last_token"])
+            samples["end_to_end"].append(end - start)
+
+
+def run_benchmark(args):
+    wav_bytes = open(args.wav, "rb").read() if args.wav else make_fixture_wav()
+
+    with FakeGroqServer(
+        first_token_delay=args.llm_first_token,
+        token_delay=args.llm_token_delay,
+        slow_fraction=args.llm_slow_fraction,
+        slow_delay=args.llm_slow_delay,
+        headers_first=args.llm_headers_first
+    ) as server, tempfile.TemporaryDirectory() as cache_dir:
+        model_router = ModelRouter() if args.model_routing else None
+        pipeline = VoicePipeline(
+            groq_client=SharedGroqClient(
+                "benchmark",
+                base_url=server.base_url,
+                max_concurrency=args.llm_concurrency,
+                requests_per_minute=1_000_000
+            ),
+            recognizer=StubRecognizer(args.question, latency=args.stt_latency),
+            intent_matcher=IntentMatcher() if args.intent_matching else None,
+            answer_cache=AnswerCache() if args.answer_cache else None,
+            tts_cache=TTSCache(cache_dir) if args.tts_cache else None,
+            synthesizer=fake_tts(latency=args.tts_latency),
+            tts_max_concurrency=args.tts_concurrency,
+            model_router=model_router
+        )
+
+        samples = defaultdict(list)
+        errors = []
+        lock = threading.Lock()
+        sessions = [
+            threading.Thread(target=run_session, args=(pipeline, wav_bytes, args.turns, samples, errors, lock))
+            for _ in range(args.sessions)
+        ]
+
+        start = time.perf_counter()
+        for session in sessions:
+            session.start()
+        for session in sessions:
+            session.join()
+        wall_time = time.perf_counter() - start
+
+    completed = len(samples["end_to_end"])
+    return {
+        "config": vars(args),
+        "python": platform.python_version(),
+        "wall_time_s": round(wall_time, 3),
+        "turns_completed": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "throughput_turns_per_s": round(completed / wall_time, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+        "model_routing": model_router.stats() if model_router else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the voice pipeline against local stub services")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="questions asked per session")
+    parser.add_argument("--wav", help="WAV recording to feed to STT (default: generated fixture)")
+    parser.add_argument("--question", default=DEFAULT_QUESTION, help="transcript returned by the stub recognizer")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="stub recognizer latency in seconds")
+    parser.add_argument("--llm-first-token", type=float, default=0.2, help="fake Groq time to first token in seconds")
+    parser.add_argument("--llm-token-delay", type=float, default=0.01, help="fake Groq delay between tokens in seconds")
+    parser.add_argument("--llm-slow-fraction", type=float, default=0.0, help="fraction of fake Groq requests that are slow")
+    parser.add_argument("--llm-slow-delay", type=float, default=2.0, help="extra time to first token of a slow request")
+    parser.add_argument("--llm-headers-first", action="store_true",
+                        help="send fake Groq stream headers before the first-token wait")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="shared Groq client concurrency cap")
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="fake TTS base latency in seconds")
+    parser.add_argument("--tts-concurrency", type=int, default=8, help="TTS event loop concurrency cap")
+    parser.add_argument("--tts-cache", action="store_true", help="enable the TTS cache (fresh per run)")
+    parser.add_argument("--answer-cache", action="store_true", help="enable the shared answer cache (fresh per run)")
+    parser.add_argument("--intent-matching", action="store_true", help="enable the SAMPLE_RESPONSES fast path")
+    parser.add_argument("--model-routing", action="store_true", help="route and hedge LLM requests with ModelRouter")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
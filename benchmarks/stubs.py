@@ -0,0 +1,180 @@
+"""
+Local stand-ins for the services the voice pipeline talks to
+A fake OpenAI-compatible Groq server, a fake TTS engine, a stub recognizer and fixture WAVs
+"""
+
+import asyncio
+import io
+import json
+import random
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Answer streamed by the fake Groq server, a few sentences like a real reply
+FAKE_ANSWER = (
+    "During my internship at Xebia I worked on MediSureAI, a healthcare platform. "
+    "It predicts medicine safety using machine learning and deep learning models. "
+    "I built parts of the data pipeline and the Streamlit dashboard. "
+    "It taught me how to turn a model into something people can actually use."
+)
+
+# One silent MPEG-1 Layer III frame (48 kbit/s, 24 kHz mono), repeated to fake TTS output
+MP3_FRAME = b"\xff\xf3\x64\xc4" + b"\x00" * 140
+
+
+class FakeGroqServer:
+    """OpenAI-compatible chat completions endpoint with configurable latency.
+
+    Streams the answer word by word as server-sent events after
+    first_token_delay seconds, sleeping token_delay between words. A
+    slow_fraction of requests waits slow_delay seconds more before the
+    first token, to mimic provider tail latency. With headers_first,
+    streamed responses send their headers before that wait.
+    """
+
+    def __init__(self, answer=FAKE_ANSWER, first_token_delay=0.2, token_delay=0.01, slow_fraction=0.0, slow_delay=2.0,
+                 headers_first=False):
+        self.answer = answer
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.slow_fraction = slow_fraction
+        self.slow_delay = slow_delay
+        self.headers_first = headers_first
+        self.requests = 0
+        self.aborted = 0
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                server.requests += 1
+                slow = random.random() < server.slow_fraction
+                streamed = body.get("stream")
+                try:
+                    if streamed and server.headers_first:
+                        self._send_headers("text/event-stream")
+                        self.wfile.flush()
+                    time.sleep(server.first_token_delay + (server.slow_delay if slow else 0))
+
+                    if streamed:
+                        self._stream(body["model"], headers_sent=server.headers_first)
+                    else:
+                        self._complete(body["model"])
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client abandoned the request, e.g. a hedge that lost
+                    server.aborted += 1
+
+            def _send_headers(self, content_type):
+                self.send_response(200)
+                self.send_header("content-type", content_type)
+                self.send_header("x-ratelimit-remaining-requests", "1000000")
+                self.end_headers()
+
+            def _complete(self, model):
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.answer},
+                        "finish_reason": "stop"
+                    }],
+                }).encode("utf-8")
+                self._send_headers("application/json")
+                self.wfile.write(payload)
+
+            def _stream(self, model, headers_sent=False):
+                if not headers_sent:
+                    self._send_headers("text/event-stream")
+                words = server.answer.split(" ")
+                for index, word in enumerate(words):
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": word if index == 0 else f" {word}"},
+                            "finish_reason": None
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(server.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+
+def fake_tts(latency=0.15, per_char=0.001, chunk_frames=8):
+    """Return an async synthesizer that sleeps like edge-tts and returns canned MP3 chunks"""
+    async def _synthesize(text):
+        await asyncio.sleep(latency + per_char * len(text))
+        buffer = io.BytesIO()
+        # Roughly one frame per 0.05 s of speech at ~15 characters per second
+        for _ in range(max(1, len(text) // (15 * chunk_frames // 20))):
+            buffer.write(MP3_FRAME * chunk_frames)
+        return buffer.getvalue()
+
+    return _synthesize
+
+
+class StubRecognizer:
+    """Recognizer that waits a fixed time and returns a fixed transcript"""
+
+    def __init__(self, transcript, latency=0.3):
+        self.transcript = transcript
+        self.latency = latency
+
+    def recognize(self, audio_data):
+        time.sleep(self.latency)
+        return self.transcript
+
+
+def make_fixture_wav(speech_seconds=2.0, silence_seconds=0.5, sample_rate=44100, channels=2):
+    """WAV bytes shaped like a browser recording: silence, a voiced segment, silence"""
+    def _silence():
+        return np.random.normal(0, 30, int(silence_seconds * sample_rate))
+
+    t = np.arange(int(speech_seconds * sample_rate)) / sample_rate
+    # Amplitude-modulated harmonics, loud enough to count as speech when trimming
+    voiced = 6000 * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)) * (
+        np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+    ) / 1.5
+    samples = np.concatenate([_silence(), voiced, _silence()]).astype("<i2")
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.repeat(samples, channels).tobytes())
+    return buffer.getvalue()
@@ -85,3 +85,95 @@ I want to contribute to scalable products, mentor peers, and stay at the forefro
 I’ve independently delivered AI and software projects end-to-end, iterated on solutions based on real-world feedback, and worked effectively in teams. 
 I approach challenges systematically and focus on delivering measurable impact, which aligns with your organization’s goals.""",
 }
+
+# Paraphrases of the questions each SAMPLE_RESPONSES entry answers,
+# used by the intent matcher to answer them without calling the LLM
+SAMPLE_QUESTIONS = {
+    "tell_me_about_yourself": [
+        "Tell me about yourself",
+        "Introduce yourself",
+        "What should we know about your life story?",
+        "Walk me through your background",
+        "Who are you?",
+    ],
+    "superpower": [
+        "What's your #1 superpower?",
+        "What is your superpower?",
+        "What is the one thing you do better than anyone else?",
+    ],
+    "growth_areas": [
+        "What are the top 3 areas you'd like to grow in?",
+        "Which areas do you want to improve in?",
+        "Where do you want to grow professionally?",
+    ],
+    "misconceptions": [
+        "What misconception do people have about you?",
+        "What do people get wrong about you?",
+        "What is a common misconception about you?",
+    ],
+    "push_boundaries": [
+        "How do you push your boundaries?",
+        "How do you push your limits?",
+        "How do you get out of your comfort zone?",
+    ],
+    "values": [
+        "What do you value most?",
+        "What are your core values?",
+        "What values guide you?",
+    ],
+    "approach_to_work": [
+        "How do you approach your work?",
+        "How do you approach a new problem or task?",
+        "What is your approach to work?",
+    ],
+    "strength": [
+        "What is your biggest strength?",
+        "What are your strengths?",
+        "What is your greatest strength?",
+    ],
+    "weakness": [
+        "What is your biggest weakness?",
+        "What are your weaknesses?",
+        "What is your greatest weakness?",
+    ],
+    "projects_overview": [
+        "What projects have you worked on?",
+        "Tell me about your projects",
+        "Give me an overview of your projects",
+    ],
+    "favorite_project": [
+        "What is your favorite project?",
+        "Which project are you most proud of?",
+        "Tell me about your favourite project",
+    ],
+    "handling_failure": [
+        "How do you handle failure?",
+        "Tell me about a time you failed",
+        "How do you deal with setbacks?",
+    ],
+    "teamwork_experience": [
+        "Tell me about your teamwork experience",
+        "How do you work in a team?",
+        "Describe a time you worked with a team",
+    ],
+    "problem_solving_example": [
+        "Give me an example of how you solved a problem",
+        "How do you approach problem solving?",
+        "Tell me about a difficult problem you solved",
+    ],
+    "why_this_company": [
+        "Why do you want to work at this company?",
+        "Why this company?",
+        "Why do you want to join us?",
+    ],
+    "long_term_goal": [
+        "What is your long term goal?",
+        "Where do you see yourself in five years?",
+        "What are your career goals?",
+    ],
+    "why_should_we_hire_you": [
+        "Why should we hire you?",
+        "Why are you the right candidate?",
+        "What makes you a good fit for this role?",
+    ],
+}
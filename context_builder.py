@@ -0,0 +1,101 @@
+"""
+Conversation context builder
+Fits chat history into a token budget and folds older turns into a rolling summary
+"""
+
+import math
+import re
+
+# Rough characters-per-token ratio for English text with Llama tokenizers
+CHARS_PER_TOKEN = 4
+
+# Longest excerpt of a turn kept in the summary
+SUMMARY_EXCERPT_CHARS = 160
+
+
+def count_tokens(text):
+    """Estimate the number of tokens in a piece of text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(chat):
+    """Token count of a history entry, computed once and cached on the entry"""
+    if 'tokens' not in chat:
+        chat['tokens'] = count_tokens(chat['message'])
+    return chat['tokens']
+
+
+def summarize_turn(chat):
+    """One summary line for a history entry: the question, or the answer's first sentence"""
+    text = " ".join(chat['message'].split())
+    if chat['role'] != 'user':
+        text = re.split(r'(?<=[.!?])\s', text, maxsplit=1)[0]
+    if len(text) > SUMMARY_EXCERPT_CHARS:
+        text = text[:SUMMARY_EXCERPT_CHARS].rsplit(" ", 1)[0] + "..."
+    return f"{'Interviewer asked' if chat['role'] == 'user' else 'Ashit answered'}: {text}"
+
+
+class ContextBuilder:
+    """Builds the Groq message list for one conversation.
+
+    The system prompt always comes first, unchanged, so providers can reuse
+    the cached prefix. Recent turns are added newest first until the token
+    budget is spent; turns that fall out of the window are folded into a
+    running summary exactly once.
+    """
+
+    def __init__(self, system_prompt, token_budget=1500, summary_budget=300):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+
+        self.summary_lines = []
+        # Number of history entries already folded into the summary
+        self.summarized = 0
+
+    def _window_start(self, history):
+        """Index of the oldest history entry that still fits in the budget"""
+        used = 0
+        start = len(history)
+        while start > self.summarized:
+            tokens = message_tokens(history[start - 1])
+            if used + tokens > self.token_budget:
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def _fold(self, history, end):
+        """Add history entries up to end to the summary, keeping it within its budget"""
+        for chat in history[self.summarized:end]:
+            self.summary_lines.append(summarize_turn(chat))
+        self.summarized = max(self.summarized, end)
+
+        while len(self.summary_lines) > 1 and count_tokens("\n".join(self.summary_lines)) > self.summary_budget:
+            self.summary_lines.pop(0)
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+    def build(self, history, user_message):
+        """Return the messages for a new user message given the chat history"""
+        start = self._window_start(history)
+        if start > self.summarized:
+            self._fold(history, start)
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary_lines:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}"
+            })
+
+        for chat in history[start:]:
+            messages.append({
+                "role": "user" if chat['role'] == 'user' else "assistant",
+                "content": chat['message']
+            })
+
+        messages.append({"role": "user", "content": user_message})
+        return messages
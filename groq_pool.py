@@ -0,0 +1,224 @@
+"""
+Shared Groq client
+One pooled client per process with a concurrency cap, rate limiting and retries
+"""
+
+import random
+import re
+import socket
+import threading
+import time
+
+import groq
+import httpx
+
+from context_builder import count_tokens
+
+# Groq reports reset times as durations such as "7.66s", "2m59.56s" or "450ms"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Seconds in a Groq duration header, or None if it is missing or malformed"""
+    if not value:
+        return None
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(headers):
+    """Seconds the provider asked us to wait before retrying, if it said"""
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def abort_response(response):
+    """Interrupt a streamed response, even while another thread is blocked reading it.
+
+    Closing the response does not wake a blocked read; shutting the socket
+    down does, and the reader sees the end of the stream.
+    """
+    network_stream = response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream else None
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class RateLimiter:
+    """Token buckets for requests and for LLM tokens, kept in step with Groq's rate-limit headers.
+
+    Groq's x-ratelimit-*-requests headers describe the requests-per-day
+    quota and its x-ratelimit-*-tokens headers the tokens-per-minute quota,
+    which long prompts exhaust first. Requests per minute are limited
+    locally; the token bucket learns its size from x-ratelimit-limit-tokens
+    and follows x-ratelimit-remaining-tokens. Running out of daily requests
+    holds everything back until x-ratelimit-reset-requests.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None):
+        self.rate = requests_per_minute / 60
+        self.capacity = requests_per_minute
+        self.requests = float(requests_per_minute)
+        self.token_rate = tokens_per_minute / 60 if tokens_per_minute else None
+        self.token_capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute) if tokens_per_minute else None
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.requests = min(self.capacity, self.requests + elapsed * self.rate)
+        if self.tokens is not None:
+            self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+        self.updated = now
+
+    def acquire(self, tokens=0):
+        """Block until a request using about the given number of tokens may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                # A request larger than the whole bucket waits for a full one
+                needed = min(tokens, self.token_capacity) if self.tokens is not None else 0
+                wait = max(
+                    self.blocked_until - now,
+                    (1 - self.requests) / self.rate,
+                    (needed - self.tokens) / self.token_rate if needed else 0
+                )
+                if wait <= 0:
+                    self.requests -= 1
+                    if needed:
+                        self.tokens -= needed
+                    return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every request for the given number of seconds"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update(self, headers):
+        """Resynchronize from x-ratelimit-* response headers"""
+        try:
+            limit_tokens = int(headers.get("x-ratelimit-limit-tokens"))
+            remaining_tokens = int(headers.get("x-ratelimit-remaining-tokens"))
+        except (TypeError, ValueError):
+            limit_tokens = None
+
+        if limit_tokens:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.token_capacity != limit_tokens:
+                    self.token_capacity = limit_tokens
+                    self.token_rate = limit_tokens / 60
+                    self.tokens = float(limit_tokens) if self.tokens is None else min(self.tokens, limit_tokens)
+                self.tokens = min(self.tokens, remaining_tokens)
+
+        try:
+            remaining_requests = int(headers.get("x-ratelimit-remaining-requests"))
+        except (TypeError, ValueError):
+            return
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining_requests == 0 and reset:
+            self.pause(reset)
+
+
+class SharedGroqClient:
+    """Groq client meant to be shared by every session in the process.
+
+    Requests go through one HTTP connection pool, at most max_concurrency
+    run at once, and rate-limited (429) or server (5xx) errors are retried
+    with jittered exponential backoff instead of being returned to the user.
+    """
+
+    def __init__(self, api_key, max_concurrency=16, requests_per_minute=30, tokens_per_minute=None,
+                 max_retries=3, base_delay=0.5, max_delay=8.0, base_url=None):
+        self.client = groq.Groq(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=max_concurrency
+                )
+            )
+        )
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _send(self, **kwargs):
+        """Send a chat completion request, retrying rate-limit and server errors"""
+        # Completion tokens are accounted for when the next response's headers arrive
+        prompt_tokens = sum(count_tokens(message.get("content") or "") for message in kwargs.get("messages", ()))
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(prompt_tokens)
+            try:
+                raw_response = self.client.chat.completions.with_raw_response.create(**kwargs)
+            except groq.APIStatusError as e:
+                self.limiter.update(e.response.headers)
+                retryable = e.status_code == 429 or e.status_code >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = retry_after(e.response.headers) or self._backoff(attempt)
+                if e.status_code == 429:
+                    self.limiter.pause(delay)
+                time.sleep(delay)
+            except groq.APIConnectionError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+            else:
+                self.limiter.update(raw_response.headers)
+                return raw_response.parse()
+
+    def create(self, **kwargs):
+        """Create a (non-streaming) chat completion"""
+        with self._semaphore:
+            return self._send(**kwargs)
+
+    def stream(self, on_open=None, **kwargs):
+        """Yield the text deltas of a streamed chat completion.
+
+        on_open, if given, is called once the response is open with a
+        function that abandons the request from any thread, for example
+        while it is still waiting for its first token.
+        """
+        with self._semaphore:
+            response = self._send(stream=True, **kwargs)
+            lock = threading.Lock()
+            reading = True
+
+            def _abort():
+                # Never touch the connection once it is back in the pool
+                with lock:
+                    if reading:
+                        abort_response(response.response)
+
+            if on_open:
+                on_open(_abort)
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                with lock:
+                    reading = False
+                # Release the connection right away when the caller stops early
+                response.close()
@@ -0,0 +1,127 @@
+"""
+Local intent matching
+Answers common interview questions from SAMPLE_RESPONSES without calling the LLM
+"""
+
+import math
+import re
+from collections import Counter
+
+from claude_responses import SAMPLE_QUESTIONS, SAMPLE_RESPONSES
+
+# Minimum cosine similarity for a question to be answered from SAMPLE_RESPONSES
+MATCH_THRESHOLD = 0.5
+
+# Words that carry no intent on their own
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "am", "do", "does", "did", "you", "your",
+    "me", "my", "i", "we", "us", "what", "which", "who", "how",
+    "why", "where", "when", "to", "of", "in", "at", "on", "for", "about",
+    "with", "have", "has", "can", "could", "would", "should", "that",
+    "this", "it", "be", "one", "and", "or", "give", "most",
+}
+
+# Words that turn a question around ("why should we not hire you?"); a match
+# only counts if the key's paraphrases use them too
+NEGATION_WORDS = {"not", "no", "never", "neither", "nor", "without", "least", "worst"}
+
+# n't contractions, with the apostrophe already removed; they count as "not"
+NEGATED_CONTRACTIONS = {
+    "dont", "doesnt", "didnt", "isnt", "arent", "wasnt", "werent", "cant", "cannot", "couldnt",
+    "wouldnt", "shouldnt", "wont", "havent", "hasnt", "hadnt", "mustnt", "neednt",
+}
+
+
+def words(text):
+    """Lowercase words of a piece of text, apostrophes removed"""
+    return re.findall(r"[a-z0-9]+", text.lower().replace("'", ""))
+
+
+def negations(text_words):
+    """Negation and opposite words used, with n't contractions as "not\""""
+    return {
+        "not" if word in NEGATED_CONTRACTIONS else word
+        for word in text_words if word in NEGATION_WORDS or word in NEGATED_CONTRACTIONS
+    }
+
+
+def stem(word):
+    """Strip a plural or noun suffix"""
+    for suffix in ("nesses", "ness", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, drop stop words, read n't as "not" and strip plural/noun suffixes.
+
+    A question made only of stop words ("Who are you?") becomes one token
+    of the whole phrase, so it still has a feature but only matches itself.
+    """
+    text_words = ["not" if word in NEGATED_CONTRACTIONS else word for word in words(text)]
+    content = [stem(word) for word in text_words if word not in STOP_WORDS]
+    if not content and text_words:
+        return [" ".join(text_words)]
+    return content
+
+
+def features(text):
+    """Unigram and bigram counts for a piece of text"""
+    tokens = tokenize(text)
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+class IntentMatcher:
+    """TF-IDF index over the paraphrases of each SAMPLE_RESPONSES key"""
+
+    def __init__(self, questions=SAMPLE_QUESTIONS, threshold=MATCH_THRESHOLD):
+        self.threshold = threshold
+
+        documents = [(key, features(q)) for key, phrases in questions.items() for q in phrases]
+        doc_freq = Counter(term for _, counts in documents for term in counts)
+        self.idf = {
+            term: math.log((1 + len(documents)) / (1 + df)) + 1
+            for term, df in doc_freq.items()
+        }
+        # Unseen words are as rare as possible, so they pull the similarity down
+        self.unknown_idf = math.log(1 + len(documents)) + 1
+        self.index = [(key, self._vector(counts)) for key, counts in documents]
+
+        # Negations any paraphrase of a key uses
+        self.negations = {key: set() for key in questions}
+        for key, phrases in questions.items():
+            for q in phrases:
+                self.negations[key] |= negations(words(q))
+
+    def _vector(self, counts):
+        """Unit-length TF-IDF vector"""
+        vector = {term: tf * self.idf.get(term, self.unknown_idf) for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {term: w / norm for term, w in vector.items()} if norm else {}
+
+    def score(self, question):
+        """Return the best matching key and its cosine similarity"""
+        query = self._vector(features(question))
+        best_key, best_score = None, 0.0
+        for key, vector in self.index:
+            score = sum(w * vector.get(term, 0.0) for term, w in query.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def match(self, question):
+        """Return the SAMPLE_RESPONSES key for a question, or None below the threshold.
+
+        A question negated where the key's paraphrases are not ("what do you
+        value least?") asks the opposite, so it does not match either.
+        """
+        key, score = self.score(question)
+        if score < self.threshold or negations(words(question)) - self.negations[key]:
+            return None
+        return key
+
+    def answer(self, question):
+        """Return the prepared answer for a question, or None if nothing matches"""
+        key = self.match(question)
+        return SAMPLE_RESPONSES[key] if key else None
@@ -0,0 +1,249 @@
+"""
+Model routing
+Picks the Groq model and response length per question under a latency SLO, and hedges slow requests
+"""
+
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+
+from tracing import LatencyHistogram
+
+# A model and the longest answer it may give for a question type
+ModelRoute = namedtuple("ModelRoute", ["model", "max_tokens"])
+
+# Candidate routes per question type, most preferred first
+ROUTES = {
+    "short": [ModelRoute("llama-3.1-8b-instant", 200)],
+    "detailed": [ModelRoute("llama-3.3-70b-versatile", 500), ModelRoute("llama-3.1-8b-instant", 500)],
+}
+
+# Target time to first token per question type, in seconds
+LATENCY_SLO = {"short": 0.8, "detailed": 1.5}
+
+# Questions about projects and technical work get the detailed route
+DETAILED_QUESTION = re.compile(
+    r"\b(projects?|built|build|architecture|design|implement\w*|technical|stack|models?|algorithms?|"
+    r"pipeline|internship|research|explain|walk me through|how did you|how does|why did you)\b",
+    re.IGNORECASE
+)
+DETAILED_MIN_WORDS = 18
+
+# Samples kept per histogram before older ones are halved away
+HISTOGRAM_WINDOW = 1000
+
+# Samples a model needs before its percentiles are trusted
+MIN_SAMPLES = 20
+
+# Fraction of requests that may be duplicated by a hedge
+HEDGE_BUDGET = 0.1
+
+# Floor for the hedge delay, so a fast p95 does not hedge every request
+MIN_HEDGE_DELAY = 0.1
+
+
+def classify_question(text):
+    """'detailed' for project and technical questions, 'short' for HR-style ones"""
+    if DETAILED_QUESTION.search(text) or len(text.split()) >= DETAILED_MIN_WORDS:
+        return "detailed"
+    return "short"
+
+
+class _Attempt:
+    """One request sent for a question, primary or hedge"""
+
+    def __init__(self, route):
+        self.route = route
+        self.cancelled = False
+        self._abort = None
+        self._lock = threading.Lock()
+
+    def opened(self, abort):
+        """Called by the client with a function that abandons the request"""
+        with self._lock:
+            self._abort = abort
+            cancelled = self.cancelled
+        if cancelled:
+            abort()
+
+    def cancel(self):
+        """Stop the attempt, closing its request even if no token has arrived yet"""
+        with self._lock:
+            self.cancelled = True
+            abort = self._abort
+        if abort:
+            abort()
+
+
+_DONE = object()
+
+
+class ModelRouter:
+    """Routes questions to models within a latency SLO and hedges slow first tokens.
+
+    Every model keeps histograms of time to first token and total time.
+    A question goes to the most preferred route for its type whose p95
+    time to first token meets the SLO, or to the fastest one if none does.
+    If no token has arrived by that model's p95 (the SLO until there are
+    enough samples), a duplicate request is sent and whichever produces a
+    token first is streamed. The other request is closed right away,
+    even before its first token, when the client calls the on_open
+    callback it is given (SharedGroqClient does); otherwise it is
+    abandoned at its next chunk.
+    """
+
+    def __init__(self, routes=ROUTES, slo=LATENCY_SLO, hedge_budget=HEDGE_BUDGET, min_samples=MIN_SAMPLES):
+        self.routes = routes
+        self.slo = slo
+        self.hedge_budget = hedge_budget
+        self.min_samples = min_samples
+
+        models = {route.model for candidates in routes.values() for route in candidates}
+        self.first_token = {model: LatencyHistogram(window=HISTOGRAM_WINDOW) for model in models}
+        self.total = {model: LatencyHistogram(window=HISTOGRAM_WINDOW) for model in models}
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def _p95(self, model):
+        histogram = self.first_token[model]
+        return histogram.percentile(95) if histogram.count >= self.min_samples else None
+
+    def route(self, user_message):
+        """Question type and the route chosen for it"""
+        question_type = classify_question(user_message)
+        candidates = self.routes[question_type]
+        slo = self.slo[question_type]
+
+        for route in candidates:
+            p95 = self._p95(route.model)
+            if p95 is None or p95 <= slo:
+                return question_type, route
+
+        # Nothing meets the SLO: take the fastest
+        return question_type, min(candidates, key=lambda route: self._p95(route.model))
+
+    def _hedge_delay(self, question_type, route):
+        p95 = self._p95(route.model)
+        return max(MIN_HEDGE_DELAY, p95 if p95 is not None else self.slo[question_type])
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.hedges >= self.hedge_budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _run(self, client, attempt, messages, params, events):
+        """Stream one attempt into the shared event queue"""
+        start = time.monotonic()
+        first_token = None
+        try:
+            chunks = client.stream(
+                model=attempt.route.model, max_tokens=attempt.route.max_tokens, messages=messages,
+                on_open=attempt.opened, **params
+            )
+            try:
+                for chunk in chunks:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                        self.first_token[attempt.route.model].observe(first_token)
+                    if attempt.cancelled:
+                        return
+                    events.put((attempt, chunk))
+            finally:
+                chunks.close()
+        except Exception as e:
+            events.put((attempt, e))
+            return
+
+        # Ended by cancel(), not by the model
+        if attempt.cancelled:
+            return
+        self.total[attempt.route.model].observe(time.monotonic() - start)
+        events.put((attempt, _DONE))
+
+    def _start(self, client, route, messages, params, events, attempts):
+        attempt = _Attempt(route)
+        attempts.append(attempt)
+        threading.Thread(
+            target=self._run, args=(client, attempt, messages, params, events),
+            name="llm-attempt", daemon=True
+        ).start()
+
+    def stream(self, client, user_message, messages, **params):
+        """Yield the answer text from whichever attempt produces a token first"""
+        question_type, route = self.route(user_message)
+        with self._lock:
+            self.requests += 1
+
+        events = queue.Queue()
+        attempts = []
+        self._start(client, route, messages, params, events, attempts)
+        # None once a hedge was sent or the budget refused one: then just wait
+        hedge_at = time.monotonic() + self._hedge_delay(question_type, route)
+
+        winner = None
+        failures = []
+        try:
+            while winner is None:
+                timeout = max(0.0, hedge_at - time.monotonic()) if hedge_at is not None else None
+                try:
+                    attempt, item = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_at = None
+                    if self._may_hedge():
+                        self._start(client, route, messages, params, events, attempts)
+                    continue
+
+                if isinstance(item, Exception):
+                    failures.append(item)
+                    if len(failures) == len(attempts):
+                        raise failures[0]
+                    continue
+
+                winner = attempt
+                if attempt is not attempts[0]:
+                    with self._lock:
+                        self.hedge_wins += 1
+                for other in attempts:
+                    if other is not winner:
+                        other.cancel()
+                if item is _DONE:
+                    return
+                yield item
+
+            while True:
+                attempt, item = events.get()
+                if attempt is not winner:
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Abandon every attempt still running, including the winner if the caller stopped reading
+            for attempt in attempts:
+                attempt.cancel()
+
+    def stats(self):
+        """Routing counters and per-model latency percentiles in seconds"""
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "models": {
+                model: {
+                    "first_token_count": self.first_token[model].count,
+                    "first_token_p50": self.first_token[model].percentile(50),
+                    "first_token_p95": self.first_token[model].percentile(95),
+                    "total_p95": self.total[model].percentile(95),
+                }
+                for model in sorted(self.first_token)
+            },
+        }
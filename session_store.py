@@ -0,0 +1,209 @@
+"""
+Session store
+Append-only conversation records shared by every app process, with SQLite and file backends
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# Fields persisted per history entry; audio stays in the AudioStore, referenced by ID
+RECORD_FIELDS = ("role", "message", "audio_id")
+
+# Role of the record left by delete(), so readers know to drop the entries they hold
+CLEARED_ROLE = "cleared"
+
+# Rows read per query when loading a conversation
+LOAD_BATCH_SIZE = 200
+
+
+class SQLiteSessionStore:
+    """Conversation records in one SQLite database in WAL mode.
+
+    WAL lets any number of processes on the node read while one writes, so
+    app workers can share conversations without sticky sessions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS turns (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    audio_id TEXT,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                ) WITHOUT ROWID
+            """)
+
+    def _connection(self):
+        """One connection per thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def append(self, session_id, records):
+        """Append history entries to a session"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (last_seq,) = connection.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM turns WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            connection.executemany(
+                "INSERT INTO turns (session_id, seq, role, message, audio_id, created) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (session_id, last_seq + i, record['role'], record['message'], record.get('audio_id'), time.time())
+                    for i, record in enumerate(records, start=1)
+                ]
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def load(self, session_id, after=0):
+        """Yield the session's entries with seq greater than after, in batches"""
+        connection = self._connection()
+        while True:
+            rows = connection.execute(
+                "SELECT seq, role, message, audio_id FROM turns WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (session_id, after, LOAD_BATCH_SIZE)
+            ).fetchall()
+            for seq, role, message, audio_id in rows:
+                yield {'seq': seq, 'role': role, 'message': message, 'audio_id': audio_id}
+            if len(rows) < LOAD_BATCH_SIZE:
+                return
+            after = rows[-1][0]
+
+    def delete(self, session_id):
+        """Remove every entry of a session, leaving a cleared record so seq keeps growing"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (last_seq,) = connection.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM turns WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            connection.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            connection.execute(
+                "INSERT INTO turns (session_id, seq, role, message, audio_id, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, last_seq + 1, CLEARED_ROLE, "", None, time.time())
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+
+class FileSessionStore:
+    """Conversation records as one JSON Lines file per session.
+
+    Appends hold an exclusive flock, so several processes sharing the
+    directory (or a network filesystem with working locks) can write safely.
+    A cleared session's file is truncated to a single cleared record that
+    carries the old end offset as its base, so seq keeps growing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{os.path.basename(session_id)}.jsonl")
+
+    @staticmethod
+    def _header(session_file):
+        """Base offset and length of the cleared record opening the file, or (0, 0)"""
+        session_file.seek(0)
+        first = session_file.readline()
+        if first.endswith(b"\n"):
+            record = json.loads(first)
+            if record['role'] == CLEARED_ROLE:
+                return record['base'], len(first)
+        return 0, 0
+
+    def append(self, session_id, records):
+        """Append history entries to a session"""
+        lines = "".join(
+            json.dumps({field: record.get(field) for field in RECORD_FIELDS}) + "\n" for record in records
+        )
+        with open(self._path(session_id), "a", encoding="utf-8") as session_file:
+            fcntl.flock(session_file, fcntl.LOCK_EX)
+            try:
+                session_file.write(lines)
+                session_file.flush()
+            finally:
+                fcntl.flock(session_file, fcntl.LOCK_UN)
+
+    def load(self, session_id, after=0):
+        """Yield the session's entries with seq greater than after.
+
+        An entry's seq is the byte offset just past its line (plus the base
+        of a cleared file), so loading only the new entries seeks straight
+        to them instead of re-reading the whole conversation on every rerun.
+        A reader still behind a clear gets the cleared record first.
+        """
+        try:
+            session_file = open(self._path(session_id), "rb")
+        except FileNotFoundError:
+            return
+
+        with session_file:
+            fcntl.flock(session_file, fcntl.LOCK_SH)
+            try:
+                base, header_length = self._header(session_file)
+                offset = after - base if after >= base + header_length else 0
+                session_file.seek(offset)
+                for line in session_file:
+                    # A line still being written by another process
+                    if not line.endswith(b"\n"):
+                        return
+                    offset += len(line)
+                    record = json.loads(line)
+                    record.pop('base', None)
+                    yield dict(record, seq=base + offset)
+            finally:
+                fcntl.flock(session_file, fcntl.LOCK_UN)
+
+    def delete(self, session_id):
+        """Remove every entry of a session, leaving a cleared record so seq keeps growing"""
+        try:
+            session_file = open(self._path(session_id), "r+b")
+        except FileNotFoundError:
+            return
+
+        with session_file:
+            fcntl.flock(session_file, fcntl.LOCK_EX)
+            try:
+                base, _ = self._header(session_file)
+                end = base + session_file.seek(0, os.SEEK_END)
+                record = dict({field: None for field in RECORD_FIELDS}, role=CLEARED_ROLE, message="", base=end)
+                session_file.seek(0)
+                session_file.truncate()
+                session_file.write(json.dumps(record).encode() + b"\n")
+                session_file.flush()
+            finally:
+                fcntl.flock(session_file, fcntl.LOCK_UN)
+
+
+def create_session_store(url):
+    """Create a store from a URL: sqlite:///path/to/db or file:///path/to/dir"""
+    parsed = urlparse(url)
+    path = parsed.netloc + parsed.path
+    if parsed.scheme == "sqlite":
+        return SQLiteSessionStore(path)
+    if parsed.scheme == "file":
+        return FileSessionStore(path)
+    raise ValueError(f"Unknown session store URL: {url}")
@@ -0,0 +1,145 @@
+"""
+Speech recognition backends
+In-memory audio decoding, silence trimming and pluggable online/offline recognizers
+"""
+
+import io
+import json
+
+import numpy as np
+import speech_recognition as sr
+
+# Format every recognizer receives: 16 kHz, 16-bit, mono
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# Silence trimming: analysis frame, padding kept around speech and minimum speech level
+FRAME_MS = 20
+SILENCE_PADDING_MS = 200
+MIN_SPEECH_RMS = 300
+
+
+def load_audio(audio_bytes):
+    """Decode WAV bytes into 16 kHz mono AudioData without touching the filesystem"""
+    # AudioFile downmixes multi-channel audio to mono while reading
+    with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+        audio_data = sr.Recognizer().record(source)
+
+    raw_data = audio_data.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+    return sr.AudioData(raw_data, SAMPLE_RATE, SAMPLE_WIDTH)
+
+
+def trim_silence(audio_data):
+    """Drop leading and trailing silence from 16-bit AudioData"""
+    samples = np.frombuffer(audio_data.get_raw_data(), dtype="<i2")
+    frame_size = audio_data.sample_rate * FRAME_MS // 1000
+    frame_count = len(samples) // frame_size
+    if not frame_count:
+        return audio_data
+
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size).astype(np.float32)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    voiced = np.flatnonzero(rms >= max(MIN_SPEECH_RMS, 0.1 * rms.max()))
+    if not voiced.size:
+        # Nothing above the speech level; let the recognizer decide
+        return audio_data
+
+    padding = SILENCE_PADDING_MS // FRAME_MS
+    start = max(voiced[0] - padding, 0) * frame_size
+    end = min((voiced[-1] + 1 + padding) * frame_size, len(samples))
+    return sr.AudioData(samples[start:end].tobytes(), audio_data.sample_rate, audio_data.sample_width)
+
+
+def prepare_audio(audio_bytes):
+    """Decode, resample and trim a recording for recognition"""
+    return trim_silence(load_audio(audio_bytes))
+
+
+class GoogleRecognizer:
+    """Google Web Speech API (online)"""
+
+    def __init__(self, language="en-US"):
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio_data):
+        return self.recognizer.recognize_google(audio_data, language=self.language)
+
+
+class SphinxRecognizer:
+    """CMU PocketSphinx through speech_recognition (offline)"""
+
+    def __init__(self, language="en-US"):
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio_data):
+        return self.recognizer.recognize_sphinx(audio_data, language=self.language)
+
+
+class VoskRecognizer:
+    """Vosk/Kaldi (offline), with the model loaded once and reused"""
+
+    def __init__(self, model_path="model"):
+        try:
+            from vosk import Model, SetLogLevel
+        except ImportError:
+            raise sr.RequestError("missing vosk module: ensure that vosk is set up correctly.")
+
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def recognize(self, audio_data):
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio_data.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def stream(self):
+        """Incremental decoder for live audio, used by streaming_stt"""
+        from vosk import KaldiRecognizer
+
+        return VoskStream(KaldiRecognizer(self.model, SAMPLE_RATE))
+
+
+class VoskStream:
+    """One utterance decoded by Vosk while it is being spoken"""
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.results = []
+
+    def accept(self, pcm):
+        """Decode more 16 kHz 16-bit audio; returns the transcript so far"""
+        if self.recognizer.AcceptWaveform(pcm):
+            self.results.append(json.loads(self.recognizer.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(text for text in [*self.results, partial] if text)
+
+    def finish(self):
+        """Flush the decoder and return the full transcript"""
+        self.results.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        text = " ".join(text for text in self.results if text)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+BACKENDS = {
+    "google": GoogleRecognizer,
+    "sphinx": SphinxRecognizer,
+    "vosk": VoskRecognizer,
+}
+
+
+def create_recognizer(backend, **options):
+    """Create the recognizer registered under a backend name"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown speech recognition backend: {backend}")
+    return BACKENDS[backend](**options)
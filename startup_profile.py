@@ -0,0 +1,89 @@
+"""
+Startup profile
+Reports the cold import time of each module the app can load and its time to first render
+
+    python startup_profile.py [--json]
+
+Each measurement runs in a fresh interpreter, so numbers are cold-start costs.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Third-party dependencies first, then the app's own modules
+MODULES = [
+    "streamlit", "audio_recorder_streamlit", "groq", "edge_tts", "speech_recognition",
+    "numpy", "aiohttp",
+    "claude_responses", "intent_matcher", "answer_cache", "context_builder", "audio_store",
+    "tts_cache", "background_loop", "speech_recognizers", "groq_pool", "voice_pipeline",
+]
+
+# Dependencies that should only be loaded by the code paths that need them
+LAZY_MODULES = ["groq", "edge_tts", "speech_recognition", "audio_recorder_streamlit"]
+
+FIRST_RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.secrets["GROQ_API_KEY"] = "startup-profile"
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "exceptions": [str(e.value) for e in app.exception],
+    "loaded": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def import_time(module):
+    """Cumulative cold import time of a module in milliseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def first_render():
+    """Time for the first full run of app.py, and which lazy modules it loaded"""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_SCRIPT, os.path.join(APP_DIR, "app.py"), *LAZY_MODULES],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app cold start")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    imports = {module: import_time(module) for module in MODULES}
+    render = first_render()
+
+    if args.json:
+        print(json.dumps({"import_ms": imports, "first_render": render}, indent=2))
+        return
+
+    print("Cold import time (cumulative, ms)")
+    for module, ms in sorted(imports.items(), key=lambda item: -(item[1] or 0)):
+        print(f"  {module:<26} {'n/a' if ms is None else f'{ms:8.1f}'}")
+    print(f"\nTime to first render: {render['seconds'] * 1000:.0f} ms")
+    print(f"Lazy modules loaded by first render: {', '.join(render['loaded']) or 'none'}")
+    for exception in render["exceptions"]:
+        print(f"  exception: {exception}")
+
+
+if __name__ == "__main__":
+    main()
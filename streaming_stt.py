@@ -0,0 +1,191 @@
+"""
+Streaming speech recognition
+Voice-activity endpointing and incremental transcription of live 16 kHz mono PCM
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from speech_recognizers import FRAME_MS, MIN_SPEECH_RMS, SAMPLE_RATE, SAMPLE_WIDTH
+
+# Speech must last this long before it counts as the start of an utterance
+MIN_SPEECH_MS = 100
+
+# Audio kept from just before speech onset, so the first syllable is not clipped
+PRE_ROLL_MS = 200
+
+# A short pause closes a phrase, which is transcribed while the user keeps talking
+PHRASE_PAUSE_MS = 250
+
+# Silence after speech that ends the utterance
+ENDPOINT_SILENCE_MS = 500
+
+# Utterances are cut at this length even without a pause
+MAX_UTTERANCE_MS = 30000
+
+# Phrases of one utterance transcribed in parallel (phrase-based recognizers)
+PHRASE_WORKERS = 2
+
+
+class VoiceActivityDetector:
+    """Energy-based speech detection over fixed frames with an adaptive noise floor"""
+
+    def __init__(self, min_speech_rms=MIN_SPEECH_RMS, noise_ratio=3.0):
+        self.min_speech_rms = min_speech_rms
+        self.noise_ratio = noise_ratio
+        self.noise_floor = None
+
+    def is_speech(self, frame):
+        """Whether a frame of 16-bit PCM contains speech"""
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = float(np.sqrt((samples ** 2).mean()))
+        if self.noise_floor is None:
+            # The user may already be talking, so never start the floor above speech level
+            self.noise_floor = min(rms, self.min_speech_rms / self.noise_ratio)
+
+        speech = rms >= max(self.min_speech_rms, self.noise_ratio * self.noise_floor)
+        if not speech:
+            # Follow the background level slowly, from non-speech frames only
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+
+class StreamingTranscriber:
+    """Turns a live PCM stream into one transcript per utterance.
+
+    Audio is fed in arbitrary chunks as it is captured. Recognizers with a
+    stream() method (Vosk) decode it incrementally; for the others each
+    phrase is sent to the recognizer as soon as a short pause closes it, so
+    by the time the endpoint is detected only the last phrase is still
+    being transcribed. on_partial is called with the transcript so far.
+    """
+
+    def __init__(self, recognizer, on_partial=None, sample_rate=SAMPLE_RATE):
+        self.recognizer = recognizer
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * SAMPLE_WIDTH
+
+        self.vad = VoiceActivityDetector()
+        self._pool = None
+        self._buffer = b""
+        self._reset()
+
+    def _frames(self, ms):
+        return max(1, ms // FRAME_MS)
+
+    def _reset(self):
+        self._pre_roll = deque(maxlen=self._frames(PRE_ROLL_MS))
+        self._onset = 0
+        self._started = False
+        self._silence = 0
+        self._length = 0
+        self._phrase = []
+        self._phrase_voiced = False
+        self._phrases = []
+        self._stream = None
+
+    def feed(self, pcm):
+        """Add captured audio; returns the transcript once an utterance has ended, else None.
+
+        Raises sr.UnknownValueError when the utterance held no recognizable
+        speech and sr.RequestError when the recognizer failed.
+        """
+        self._buffer += pcm
+        voiced = []
+        for offset in range(0, len(self._buffer) - self.frame_bytes + 1, self.frame_bytes):
+            frame = self._buffer[offset:offset + self.frame_bytes]
+            if self._add_frame(frame, voiced):
+                self._buffer = self._buffer[offset + self.frame_bytes:]
+                return self._finish(voiced)
+        self._buffer = self._buffer[len(self._buffer) - len(self._buffer) % self.frame_bytes:]
+        self._decode(voiced)
+        return None
+
+    def _add_frame(self, frame, voiced):
+        """Track one frame; returns True at the end of an utterance"""
+        speech = self.vad.is_speech(frame)
+        if not self._started:
+            self._pre_roll.append(frame)
+            self._onset = self._onset + 1 if speech else 0
+            if self._onset < self._frames(MIN_SPEECH_MS):
+                return False
+            self._started = True
+            self._phrase_voiced = True
+            frames = list(self._pre_roll)
+        else:
+            frames = [frame]
+            self._silence = 0 if speech else self._silence + 1
+            self._phrase_voiced = self._phrase_voiced or speech
+
+        self._length += len(frames)
+        if hasattr(self.recognizer, "stream"):
+            voiced.extend(frames)
+        else:
+            self._phrase.extend(frames)
+            if self._silence == self._frames(PHRASE_PAUSE_MS) and self._phrase_voiced:
+                self._close_phrase()
+
+        return self._silence >= self._frames(ENDPOINT_SILENCE_MS) or self._length >= self._frames(MAX_UTTERANCE_MS)
+
+    def _decode(self, frames):
+        """Pass new utterance audio to an incremental decoder"""
+        if not frames:
+            return
+        if self._stream is None:
+            self._stream = self.recognizer.stream()
+        partial = self._stream.accept(b"".join(frames))
+        if partial and self.on_partial:
+            self.on_partial(partial)
+
+    def _close_phrase(self):
+        """Start transcribing the current phrase in the background"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=PHRASE_WORKERS, thread_name_prefix="stt-phrase")
+        audio_data = sr.AudioData(b"".join(self._phrase), self.sample_rate, SAMPLE_WIDTH)
+        future = self._pool.submit(self.recognizer.recognize, audio_data)
+        future.add_done_callback(self._report_partial)
+        self._phrases.append(future)
+        self._phrase = []
+        self._phrase_voiced = False
+
+    def _report_partial(self, _):
+        if not self.on_partial:
+            return
+        texts = []
+        for future in list(self._phrases):
+            if not future.done():
+                break
+            if future.exception() is None:
+                texts.append(future.result())
+        if texts:
+            self.on_partial(" ".join(texts))
+
+    def _finish(self, voiced):
+        """Complete the utterance and start listening for the next one"""
+        try:
+            if hasattr(self.recognizer, "stream"):
+                self._decode(voiced)
+                return self._stream.finish()
+
+            if self._phrase_voiced:
+                self._close_phrase()
+            texts = []
+            for future in self._phrases:
+                try:
+                    texts.append(future.result())
+                except sr.UnknownValueError:
+                    continue
+            if not texts:
+                raise sr.UnknownValueError()
+            return " ".join(texts)
+        finally:
+            self._reset()
+
+    def close(self):
+        """Stop the phrase workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,47 @@
+import pytest
+
+from answer_cache import AnswerCache, is_standalone, normalize_question
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Why did you leave Xebia?", "When did you leave Xebia?"),
+    ("How did you build the Resume Generator?", "Why did you build the Resume Generator?"),
+])
+def test_different_interrogatives_do_not_share_answers(first, second):
+    assert normalize_question(first) != normalize_question(second)
+
+    cache = AnswerCache()
+    cache.put(first, "answer to the first question")
+    assert cache.get(second) is None
+    assert cache.get(first)['answer'] == "answer to the first question"
+
+
+@pytest.mark.parametrize("negated", ["Is AI not dangerous?", "Isn't AI dangerous?", "Is AI never dangerous?"])
+def test_negated_questions_do_not_share_answers(negated):
+    cache = AnswerCache()
+    cache.put("Is AI dangerous?", "answer")
+    assert cache.get(negated) is None
+
+    cache.put(negated, "negated answer")
+    assert cache.get("Is AI dangerous?")['answer'] == "answer"
+
+
+def test_reworded_question_still_hits():
+    cache = AnswerCache()
+    cache.put("Why did you leave Xebia?", "answer")
+    assert cache.get("why did u leave xebia")['answer'] == "answer"
+
+
+@pytest.mark.parametrize("question", [
+    "Tell me about this project",
+    "What did you do there?",
+    "Why?",
+    "How so?",
+    "Can you expand on that?",
+])
+def test_follow_ups_are_not_standalone(question):
+    assert not is_standalone(question)
+
+
+def test_plain_question_is_standalone():
+    assert is_standalone("Why did you leave Xebia?")
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from api_server import create_app
+
+
+class FakePipeline:
+    def respond(self, user_message, history, context, on_text=None, on_audio=None):
+        on_text("Answer.")
+        return "Answer.", None, None
+
+
+def run_with_client(check):
+    async def _run():
+        async with TestClient(TestServer(create_app(FakePipeline(), workers=1))) as client:
+            await check(client)
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize("body", [
+    "not json",
+    "[1, 2]",
+    '"text"',
+    '{"text": 42}',
+    '{"text": ["Hi"]}',
+    '{"text": "Hi", "session_id": {"id": 1}}',
+])
+def test_turn_rejects_malformed_questions(body):
+    async def check(client):
+        response = await client.post("/v1/turn", data=body, headers={"Content-Type": "application/json"})
+        assert response.status == 400
+
+    run_with_client(check)
+
+
+def test_turn_answers_a_valid_question():
+    async def check(client):
+        response = await client.post("/v1/turn", json={"text": "Hi"})
+        assert response.status == 200
+        assert (await response.json())["response"] == "Answer."
+
+    run_with_client(check)
+
+
+def test_websocket_reports_malformed_messages_and_stays_open():
+    async def check(client):
+        async with client.ws_connect("/v1/ws") as ws:
+            assert (await ws.receive_json())["type"] == "session"
+
+            for message in ("not json", "[1]", '{"text": 42}'):
+                await ws.send_str(message)
+                assert (await ws.receive_json())["type"] == "error"
+
+            await ws.send_json({"type": "text", "text": "Hi"})
+            events = []
+            while not events or events[-1]["type"] != "done":
+                events.append(await ws.receive_json())
+            assert events[-1]["response"] == "Answer."
+
+    run_with_client(check)
@@ -0,0 +1,77 @@
+import os
+import shutil
+
+from audio_store import AudioStore
+
+
+def test_limits_count_blobs_from_other_processes(tmp_path):
+    first = AudioStore(str(tmp_path), session_limit=1000, global_limit=2500)
+    second = AudioStore(str(tmp_path), session_limit=1000, global_limit=2500)
+
+    old = [first.put("a", b"x" * 800), first.put("b", b"x" * 800)]
+    new = [second.put("c", b"x" * 800), second.put("d", b"x" * 800)]
+
+    # The second store saw the first one's blobs and evicted the oldest
+    assert first.get(old[0]) is None
+    assert all(second.get(blob_id) for blob_id in old[1:] + new)
+
+
+def test_blobs_from_before_a_restart_are_counted(tmp_path):
+    blob_id = AudioStore(str(tmp_path), session_limit=1000).put("a", b"x" * 800)
+
+    restarted = AudioStore(str(tmp_path), session_limit=1000)
+    restarted.put("a", b"x" * 800)
+
+    assert restarted.get(blob_id) is None
+
+
+def test_delete_session_removes_blobs_written_elsewhere(tmp_path):
+    blob_id = AudioStore(str(tmp_path)).put("a", b"audio")
+    other = AudioStore(str(tmp_path))
+
+    other.delete_session("a")
+
+    assert other.get(blob_id) is None
+
+
+def test_put_survives_a_session_cleared_during_the_scan(tmp_path, monkeypatch):
+    store = AudioStore(str(tmp_path))
+    store.put("a", b"audio")
+
+    scandir = os.scandir
+    cleared = []
+
+    def clearing_scandir(path):
+        # Another process clears session "a" between listing and scanning it
+        if isinstance(path, str) and os.path.basename(path) == "a" and not cleared:
+            cleared.append(path)
+            shutil.rmtree(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", clearing_scandir)
+    blob_id = store.put("b", b"audio")
+
+    assert cleared
+    assert store.get(blob_id) == b"audio"
+
+
+def test_replace_does_not_recreate_a_cleared_session(tmp_path, monkeypatch):
+    store = AudioStore(str(tmp_path))
+    blob_id = store.put("a", b"audio")
+
+    exists = os.path.exists
+    other = AudioStore(str(tmp_path))
+
+    def clearing_exists(path):
+        # Another process clears the session right after replace() saw the blob
+        found = exists(path)
+        if path == store._path(blob_id):
+            other.delete_session("a")
+        return found
+
+    monkeypatch.setattr(os.path, "exists", clearing_exists)
+    store.replace(blob_id, b"smaller")
+    monkeypatch.undo()
+
+    assert not os.path.exists(tmp_path / "a")
+    assert store.get(blob_id) is None
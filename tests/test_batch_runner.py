@@ -0,0 +1,43 @@
+import asyncio
+import json
+import os
+
+from batch_runner import BatchRunner, audio_name, completed_ids
+
+
+class FakePipeline:
+    def get_claude_response(self, question, history, context):
+        return f"Answer to {question}"
+
+    def synthesize_speech(self, text):
+        return b"mp3"
+
+
+def test_resume_after_a_run_killed_mid_write(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    results_path.write_text(
+        json.dumps({"id": "done", "question": "q", "answer": "a", "audio": "audio/done.mp3"}) + "\n"
+        + '{"id": "cut", "question": "q", "ans',
+        encoding="utf-8"
+    )
+    assert completed_ids(str(results_path)) == {"done"}
+
+    runner = BatchRunner(FakePipeline(), str(tmp_path))
+    asyncio.run(runner.run([("done", "First?"), ("cut", "Second?")]))
+
+    assert runner.stats["skipped"] == 1
+    assert completed_ids(str(results_path)) == {"done", "cut"}
+
+
+def test_item_ids_cannot_escape_the_audio_directory(tmp_path):
+    runner = BatchRunner(FakePipeline(), str(tmp_path))
+    asyncio.run(runner.run([("../../escape", "Where?"), ("..", "Up?")]))
+
+    assert sorted(os.listdir(tmp_path)) == ["audio", "results.jsonl"]
+    assert len(os.listdir(tmp_path / "audio")) == 2
+
+
+def test_audio_names():
+    assert audio_name("why_this_company") == "why_this_company"
+    assert audio_name("../x") != audio_name("x")
+    assert "/" not in audio_name("a/b") and audio_name("a/b") != audio_name("ab")
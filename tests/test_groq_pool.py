@@ -0,0 +1,141 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import groq
+import httpx
+import pytest
+
+from benchmarks.stubs import FakeGroqServer
+from groq_pool import RateLimiter, SharedGroqClient, parse_duration
+
+
+def test_abort_closes_a_stream_waiting_for_its_first_token():
+    with FakeGroqServer(first_token_delay=5.0, headers_first=True) as server:
+        client = SharedGroqClient("test", base_url=server.base_url, max_concurrency=1)
+        opened = threading.Event()
+        aborts = []
+        chunks = []
+
+        def _on_open(abort):
+            aborts.append(abort)
+            opened.set()
+
+        def _read():
+            try:
+                chunks.extend(client.stream(model="m", messages=[], on_open=_on_open))
+            except Exception:
+                pass
+
+        reader = threading.Thread(target=_read)
+        start = time.monotonic()
+        reader.start()
+        assert opened.wait(2.0)
+        aborts[0]()
+        reader.join(2.0)
+
+        assert not reader.is_alive()
+        assert chunks == []
+        assert time.monotonic() - start < 2.0
+        # The concurrency slot was released
+        assert client._semaphore.acquire(timeout=0.1)
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7.66s", 7.66),
+    ("2m59.56s", 179.56),
+    ("450ms", 0.45),
+    ("1h2m3s", 3723),
+    ("", None),
+    (None, None),
+    ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    if seconds is None:
+        assert parse_duration(value) is None
+    else:
+        assert parse_duration(value) == pytest.approx(seconds)
+
+
+def timed_acquire(limiter, tokens=0):
+    start = time.monotonic()
+    limiter.acquire(tokens)
+    return time.monotonic() - start
+
+
+def test_daily_request_headers_do_not_drain_the_minute_bucket():
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.update({"x-ratelimit-remaining-requests": "3", "x-ratelimit-reset-requests": "2m59.56s"})
+
+    assert sum(timed_acquire(limiter) for _ in range(10)) < 0.1
+
+
+def test_exhausted_daily_requests_pause_until_reset():
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "300ms"})
+
+    assert timed_acquire(limiter) >= 0.25
+
+
+def test_token_bucket_follows_token_headers():
+    limiter = RateLimiter(requests_per_minute=600)
+    # No token limit is known before the first response
+    assert timed_acquire(limiter, tokens=10_000) < 0.05
+
+    # 600 tokens per minute refill at 10 per second
+    limiter.update({"x-ratelimit-limit-tokens": "600", "x-ratelimit-remaining-tokens": "0"})
+    assert timed_acquire(limiter, tokens=3) >= 0.25
+
+
+def status_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return groq.APIStatusError(f"status {status}", response=response, body=None)
+
+
+class FakeRawResponse:
+    headers = {}
+
+    def parse(self):
+        return "completion"
+
+
+class FakeCompletions:
+    """Raises the given errors in turn, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeRawResponse()
+
+
+def client_with(completions, max_retries=3):
+    client = SharedGroqClient("test", requests_per_minute=600, max_retries=max_retries, base_delay=0.001)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=completions)))
+    return client
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_rate_limit_and_server_errors_are_retried(status):
+    completions = FakeCompletions(status_error(status, {"retry-after": "0.01"}), status_error(status))
+    assert client_with(completions).create(model="m", messages=[]) == "completion"
+    assert completions.calls == 3
+
+
+def test_client_errors_are_not_retried():
+    completions = FakeCompletions(status_error(400))
+    with pytest.raises(groq.APIStatusError):
+        client_with(completions).create(model="m", messages=[])
+    assert completions.calls == 1
+
+
+def test_retries_give_up_after_max_retries():
+    completions = FakeCompletions(*(status_error(503) for _ in range(5)))
+    with pytest.raises(groq.APIStatusError):
+        client_with(completions, max_retries=2).create(model="m", messages=[])
+    assert completions.calls == 3
@@ -0,0 +1,34 @@
+import pytest
+
+from claude_responses import SAMPLE_QUESTIONS
+from intent_matcher import IntentMatcher, features
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IntentMatcher()
+
+
+@pytest.mark.parametrize("key, question", [
+    (key, question) for key, questions in SAMPLE_QUESTIONS.items() for question in questions
+])
+def test_sample_question_matches_its_key(matcher, key, question):
+    assert features(question)
+    assert matcher.match(question) == key
+
+
+@pytest.mark.parametrize("question", [
+    "How are you?",
+    "Who inspired you?",
+    "Why?",
+    "Why should we not hire you?",
+    "Why shouldn't we hire you?",
+    "What do you value least?",
+])
+def test_stop_word_questions_do_not_match(matcher, question):
+    assert matcher.match(question) is None
+
+
+def test_negated_paraphrases_still_match():
+    matcher = IntentMatcher({"weakness": ["What are you not good at?"]})
+    assert matcher.match("What aren't you good at?") == "weakness"
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from model_router import ModelRouter
+
+
+class SlowClient:
+    """Streams a fixed answer after a delay before the first token"""
+
+    def __init__(self, first_token_delay):
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+
+    def stream(self, **kwargs):
+        self.requests += 1
+
+        def _chunks():
+            time.sleep(self.first_token_delay)
+            yield "Hello "
+            yield "there."
+
+        return _chunks()
+
+
+def test_slow_requests_wait_once_hedge_budget_is_spent():
+    router = ModelRouter(slo={"short": 0.05, "detailed": 0.05})
+    client = SlowClient(first_token_delay=0.2)
+
+    answers = ["".join(router.stream(client, "What is your strength?", [])) for _ in range(3)]
+
+    # Only the first request fits in the 10% budget; the others wait for their token
+    assert answers == ["Hello there."] * 3
+    assert router.hedges == 1
+    assert client.requests == 4
+
+
+def test_hedge_sent_within_budget():
+    router = ModelRouter(slo={"short": 0.05, "detailed": 0.05}, hedge_budget=1.0)
+    client = SlowClient(first_token_delay=0.2)
+
+    assert "".join(router.stream(client, "What is your strength?", [])) == "Hello there."
+    assert router.hedges == 1
+    assert client.requests == 2
+
+
+class AbortableClient:
+    """Waits out the given first-token delays in order, unless the router aborts the request"""
+
+    def __init__(self, *first_token_delays):
+        self.first_token_delays = list(first_token_delays)
+        self.aborted = threading.Event()
+
+    def stream(self, on_open=None, **kwargs):
+        delay = self.first_token_delays.pop(0)
+        abort = threading.Event()
+
+        def _chunks():
+            on_open(abort.set)
+            if abort.wait(delay):
+                self.aborted.set()
+                return
+            yield "Hello "
+            yield "there."
+
+        return _chunks()
+
+
+def test_losing_request_is_closed_before_its_first_token():
+    router = ModelRouter(slo={"short": 0.05, "detailed": 0.05}, hedge_budget=1.0)
+    client = AbortableClient(5.0, 0.01)
+
+    assert "".join(router.stream(client, "What is your strength?", [])) == "Hello there."
+    assert router.hedge_wins == 1
+    # The slow primary is closed as soon as the hedge wins, not when its token finally arrives
+    assert client.aborted.wait(1.0)
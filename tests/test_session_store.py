@@ -0,0 +1,58 @@
+import pytest
+
+from session_store import CLEARED_ROLE, FileSessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    return FileSessionStore(str(tmp_path / "sessions"))
+
+
+def messages(records):
+    return [record['message'] for record in records]
+
+
+def test_load_after_returns_only_new_entries(store):
+    store.append("s", [{'role': 'user', 'message': "one"}, {'role': 'assistant', 'message': "two"}])
+    seq = list(store.load("s"))[-1]['seq']
+    store.append("s", [{'role': 'user', 'message': "three"}])
+
+    assert messages(store.load("s", after=seq)) == ["three"]
+    assert messages(store.load("s")) == ["one", "two", "three"]
+
+
+def test_delete_leaves_a_cleared_record_for_readers_behind_it(store):
+    store.append("s", [{'role': 'user', 'message': "one"}, {'role': 'assistant', 'message': "two"}])
+    seq = list(store.load("s"))[-1]['seq']
+
+    store.delete("s")
+    store.append("s", [{'role': 'user', 'message': "three"}])
+
+    records = list(store.load("s", after=seq))
+    assert [record['role'] for record in records] == [CLEARED_ROLE, "user"]
+    assert messages(records[1:]) == ["three"]
+    # seq keeps growing, so no reader mistakes the new entries for ones it has seen
+    assert seq < records[0]['seq'] < records[1]['seq']
+    assert messages(store.load("s", after=records[0]['seq'])) == ["three"]
+
+
+def test_repeated_deletes_keep_seq_growing(store):
+    seqs = []
+    for message in ("one", "two", "three"):
+        store.append("s", [{'role': 'user', 'message': message}])
+        store.delete("s")
+        seqs.append(list(store.load("s"))[-1]['seq'])
+
+    assert seqs == sorted(set(seqs))
+    assert [record['role'] for record in store.load("s")] == [CLEARED_ROLE]
+
+
+def test_file_store_skips_a_line_still_being_written(tmp_path):
+    store = FileSessionStore(str(tmp_path))
+    store.append("s", [{'role': 'user', 'message': "one"}])
+    with open(store._path("s"), "a", encoding="utf-8") as session_file:
+        session_file.write('{"role": "assistant", "mess')
+
+    assert messages(store.load("s")) == ["one"]
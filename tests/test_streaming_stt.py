@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from speech_recognizers import SAMPLE_RATE
+from streaming_stt import StreamingTranscriber, VoiceActivityDetector
+
+
+def tone(seconds, amplitude=3000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+
+
+def silence(seconds, amplitude=20):
+    noise = np.random.default_rng(0).normal(0, amplitude, int(seconds * SAMPLE_RATE))
+    return noise.astype("<i2").tobytes()
+
+
+class CountingRecognizer:
+    """Transcribes every phrase as "phrase <n>" """
+
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, audio_data):
+        self.calls += 1
+        return f"phrase {self.calls}"
+
+
+def feed(transcriber, pcm, chunk_ms=100):
+    """Feed audio in capture-sized chunks and collect the transcripts"""
+    chunk = SAMPLE_RATE * chunk_ms // 1000 * 2
+    results = [transcriber.feed(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk)]
+    return [result for result in results if result is not None]
+
+
+def test_speech_from_the_first_frame_is_detected():
+    transcriber = StreamingTranscriber(CountingRecognizer())
+    assert feed(transcriber, tone(1.0) + silence(0.8)) == ["phrase 1"]
+
+
+def test_utterance_after_silence_ends_at_the_pause():
+    transcriber = StreamingTranscriber(CountingRecognizer())
+    assert feed(transcriber, silence(0.5) + tone(1.0)) == []
+    assert feed(transcriber, silence(0.8)) == ["phrase 1"]
+
+
+def test_short_pauses_split_phrases_of_one_utterance():
+    recognizer = CountingRecognizer()
+    transcriber = StreamingTranscriber(recognizer)
+    pcm = silence(0.3) + tone(0.6) + silence(0.3) + tone(0.6) + silence(0.8)
+
+    assert feed(transcriber, pcm) == ["phrase 1 phrase 2"]
+    assert recognizer.calls == 2
+
+
+def test_silence_alone_is_not_an_utterance():
+    transcriber = StreamingTranscriber(CountingRecognizer())
+    assert feed(transcriber, silence(3.0)) == []
+
+
+def test_unrecognized_utterance_raises():
+    class Deaf:
+        def recognize(self, audio_data):
+            raise sr.UnknownValueError()
+
+    transcriber = StreamingTranscriber(Deaf())
+    with pytest.raises(sr.UnknownValueError):
+        feed(transcriber, tone(0.5) + silence(0.8))
+
+
+def test_noise_floor_starts_below_speech_level():
+    vad = VoiceActivityDetector()
+    assert vad.is_speech(tone(0.02))
+    assert vad.noise_floor <= vad.min_speech_rms / vad.noise_ratio
+    assert not vad.is_speech(silence(0.02))
+
+
+def test_incremental_recognizer_gets_the_whole_utterance():
+    class Decoder:
+        def __init__(self):
+            self.audio = b""
+
+        def accept(self, pcm):
+            self.audio += pcm
+            return "partial"
+
+        def finish(self):
+            return f"{len(self.audio)} bytes"
+
+    class Incremental:
+        def stream(self):
+            return Decoder()
+
+    partials = []
+    transcriber = StreamingTranscriber(Incremental(), on_partial=partials.append)
+    [transcript] = feed(transcriber, silence(0.5) + tone(1.0) + silence(0.8))
+
+    # Pre-roll, speech and the trailing silence up to the endpoint
+    assert int(transcript.split()[0]) >= len(tone(1.0))
+    assert partials and set(partials) == {"partial"}
@@ -0,0 +1,129 @@
+import pytest
+
+from tracing import LatencyHistogram, Tracer, isolated
+
+BUCKETS = (0.1, 0.2, 0.5)
+
+
+def test_percentile_is_the_upper_bound_of_its_bucket():
+    histogram = LatencyHistogram(BUCKETS)
+    for _ in range(8):
+        histogram.observe(0.05)
+    for _ in range(2):
+        histogram.observe(0.3)
+
+    assert histogram.percentile(50) == 0.1
+    assert histogram.percentile(80) == 0.1
+    assert histogram.percentile(95) == 0.5
+
+
+def test_percentile_without_samples_is_none():
+    assert LatencyHistogram(BUCKETS).percentile(50) is None
+
+
+def test_percentile_past_the_last_bucket_is_the_last_bound():
+    histogram = LatencyHistogram(BUCKETS)
+    histogram.observe(3)
+
+    assert histogram.percentile(99) == 0.5
+    assert histogram.snapshot()["buckets"][-1] == (float("inf"), 1)
+
+
+def test_window_halves_older_samples():
+    histogram = LatencyHistogram(BUCKETS, window=4)
+    for _ in range(4):
+        histogram.observe(0.05)
+    histogram.observe(0.3)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 3
+    assert snapshot["buckets"] == [(0.1, 2), (0.2, 2), (0.5, 3), (float("inf"), 3)]
+    assert snapshot["sum"] == pytest.approx(0.1 + 0.3)
+
+
+def test_window_lets_recent_latency_take_over():
+    histogram = LatencyHistogram(BUCKETS, window=10)
+    for _ in range(10):
+        histogram.observe(0.05)
+    for _ in range(10):
+        histogram.observe(0.3)
+
+    assert histogram.percentile(50) == 0.5
+
+
+def test_spans_nest_within_a_trace():
+    tracer = Tracer()
+    with tracer.span("turn") as turn:
+        with tracer.span("llm") as llm:
+            pass
+    with tracer.span("turn") as other:
+        pass
+
+    assert turn.parent_id is None
+    assert (llm.trace_id, llm.parent_id) == (turn.trace_id, turn.span_id)
+    assert other.trace_id != turn.trace_id
+    assert [span.name for span in tracer.last_trace()] == ["turn"]
+
+
+def test_raised_and_handled_errors_are_counted():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("stt"):
+            raise ValueError("bad audio")
+    with tracer.span("stt") as span:
+        span.fail("not_understood")
+
+    assert tracer.summary()["stt"]["errors"] == 2
+    assert tracer.recent[0].error == "ValueError"
+
+
+def test_span_opened_in_an_isolated_generator_does_not_leak():
+    tracer = Tracer()
+
+    def _chunks():
+        with tracer.span("llm"):
+            yield "Hello "
+            yield "there."
+
+    with tracer.span("turn") as turn:
+        children = []
+        for _ in isolated(_chunks()):
+            with tracer.span("tts") as tts:
+                children.append(tts)
+
+    assert [tts.parent_id for tts in children] == [turn.span_id, turn.span_id]
+
+
+def test_isolated_closes_an_abandoned_generator():
+    tracer = Tracer()
+
+    def _chunks():
+        with tracer.span("llm"):
+            yield "Hello "
+            yield "there."
+
+    chunks = isolated(_chunks())
+    next(chunks)
+    chunks.close()
+
+    assert [span.name for span in tracer.recent] == ["llm"]
+    assert tracer.recent[0].error is None
+
+
+def test_prometheus_text():
+    tracer = Tracer()
+    tracer.durations["tts"] = LatencyHistogram(BUCKETS)
+    with tracer.span("tts", text_chars=12, cache="miss") as span:
+        span.fail("timeout")
+    tracer.observe("tts", 0.3)
+
+    lines = tracer.prometheus_text().splitlines()
+    assert "# TYPE voice_bot_span_duration_seconds histogram" in lines
+    assert 'voice_bot_span_duration_seconds_bucket{span="tts",le="0.1"} 1' in lines
+    assert 'voice_bot_span_duration_seconds_bucket{span="tts",le="0.2"} 1' in lines
+    assert 'voice_bot_span_duration_seconds_bucket{span="tts",le="0.5"} 2' in lines
+    assert 'voice_bot_span_duration_seconds_bucket{span="tts",le="+Inf"} 2' in lines
+    assert 'voice_bot_span_duration_seconds_count{span="tts"} 2' in lines
+    assert 'voice_bot_span_errors_total{span="tts"} 1' in lines
+    assert 'voice_bot_span_size_total{span="tts",attribute="text_chars"} 12.0' in lines
+    assert 'voice_bot_span_outcomes_total{span="tts",attribute="cache",value="miss"} 1' in lines
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from answer_cache import AnswerCache
+from claude_responses import SYSTEM_PROMPT
+from context_builder import ContextBuilder
+from voice_pipeline import ResponseError, VoicePipeline
+
+
+class FailingClient:
+    """Streams one sentence, then loses the connection"""
+
+    def stream(self, **kwargs):
+        yield "I built a PDF chat reader. "
+        raise ConnectionError("connection dropped")
+
+
+class AnsweringClient:
+    def stream(self, **kwargs):
+        yield "I built a PDF chat reader."
+
+
+class TwoSentenceClient:
+    def stream(self, **kwargs):
+        yield "I built a PDF chat reader. "
+        yield "It answers questions about papers."
+
+
+async def fake_speech(text):
+    return b"mp3"
+
+
+def make_pipeline(client):
+    return VoicePipeline(groq_client=client, answer_cache=AnswerCache(), synthesizer=fake_speech)
+
+
+QUESTION = "What did you build at your internship?"
+
+
+def test_failed_answer_is_not_shared():
+    pipeline = make_pipeline(FailingClient())
+    text, _, _ = pipeline.respond(QUESTION, [], ContextBuilder(SYSTEM_PROMPT))
+
+    assert text == "I built a PDF chat reader. Error getting response: connection dropped"
+    assert pipeline.answer_cache.get(QUESTION) is None
+    assert pipeline.tracer.summary()["llm"]["errors"] == 1
+
+
+def test_complete_answer_is_shared():
+    pipeline = make_pipeline(AnsweringClient())
+    pipeline.respond(QUESTION, [], ContextBuilder(SYSTEM_PROMPT))
+
+    assert pipeline.answer_cache.get(QUESTION)['answer'] == "I built a PDF chat reader."
+
+
+def test_answer_given_with_history_is_not_shared():
+    pipeline = make_pipeline(AnsweringClient())
+    history = [
+        {'role': 'user', 'message': "Tell me about MediSureAI"},
+        {'role': 'assistant', 'message': "It predicts medicine safety."},
+    ]
+    pipeline.respond("What was your role?", history, ContextBuilder(SYSTEM_PROMPT))
+
+    assert pipeline.answer_cache.get("What was your role?") is None
+
+
+def test_speech_spans_belong_to_the_turn():
+    pipeline = make_pipeline(TwoSentenceClient())
+    pipeline.respond(QUESTION, [], ContextBuilder(SYSTEM_PROMPT))
+
+    spans = pipeline.tracer.last_trace(root="turn")
+    turn = next(span for span in spans if span.name == "turn")
+    tts_parents = [span.parent_id for span in spans if span.name == "tts"]
+    assert tts_parents == [turn.span_id, turn.span_id]
+
+
+def test_get_claude_response_raises_on_failure():
+    pipeline = make_pipeline(FailingClient())
+    with pytest.raises(ResponseError, match="connection dropped"):
+        pipeline.get_claude_response(QUESTION, [], ContextBuilder(SYSTEM_PROMPT))
+
+
+def test_loading_the_recognizer_does_not_block_the_llm(monkeypatch):
+    import speech_recognizers
+
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_recognizer(backend, **options):
+        loading.set()
+        release.wait(5)
+        return object()
+
+    monkeypatch.setattr(speech_recognizers, "create_recognizer", slow_recognizer)
+    pipeline = VoicePipeline(groq_client_factory=AnsweringClient)
+    loader = threading.Thread(target=lambda: pipeline.recognizer)
+    loader.start()
+    try:
+        assert loading.wait(5)
+        start = time.monotonic()
+        assert isinstance(pipeline.groq_client, AnsweringClient)
+        assert time.monotonic() - start < 0.5
+    finally:
+        release.set()
+        loader.join()
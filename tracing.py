@@ -0,0 +1,304 @@
+"""
+Tracing
+Per-request spans for each pipeline stage, aggregated into histograms for Prometheus or JSON export
+"""
+
+import bisect
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1, 1.5, 2, 3, 5, 8, 13, 20, 30)
+
+# Finished spans kept for inspection, most recent last
+RECENT_SPANS = 500
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "voice_bot"
+
+# Span being recorded in the current thread or task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class LatencyHistogram:
+    """Bucketed latencies; with a window, older samples are halved away to favour recent ones"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=None):
+        self.buckets = buckets
+        self.window = window
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            if self.window and self.count >= self.window:
+                self.counts = [count // 2 for count in self.counts]
+                self.total *= sum(self.counts) / self.count
+                self.count = sum(self.counts)
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile, None without samples"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return self.buckets[-1]
+
+    def snapshot(self):
+        """Bucket bounds with cumulative counts, plus count and sum"""
+        with self._lock:
+            cumulative, seen = [], 0
+            for bound, count in zip((*self.buckets, float("inf")), self.counts):
+                seen += count
+                cumulative.append((bound, seen))
+            return {"buckets": cumulative, "count": self.count, "sum": self.total}
+
+
+class Span:
+    """One timed stage of a request, with size and outcome attributes"""
+
+    def __init__(self, name, trace_id, parent_id, span_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = span_id
+        self.attributes = attributes
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        """Record sizes (numbers, summed in the metrics) or outcomes (strings, counted per value)"""
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        """Mark the span as failed, for errors that are handled rather than raised"""
+        self.error = error if isinstance(error, str) else type(error).__name__
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "span_id": self.span_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _SpanContext:
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        self.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.span.duration = time.perf_counter() - self.started
+        # A generator closed early is not a failure
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.span.fail(exc)
+        try:
+            _current_span.reset(self.token)
+        except ValueError:
+            # Generator finalized from another context; nothing to restore there
+            pass
+        self.tracer.record(self.span)
+        return False
+
+
+def isolated(iterable):
+    """Iterate in a context of its own.
+
+    A span opened inside a generator would otherwise stay current in the
+    caller between items, and spans the caller opens meanwhile would nest
+    under it.
+    """
+    context = contextvars.copy_context()
+    iterator = iter(iterable)
+    try:
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            context.run(iterator.close)
+
+
+class Tracer:
+    """Collects spans and keeps per-stage aggregates.
+
+    Spans opened inside another span in the same context belong to its
+    trace; a span opened with no span active starts a new trace. Work handed
+    to other threads keeps its trace when run with contextvars.copy_context().
+    """
+
+    def __init__(self, recent=RECENT_SPANS):
+        self.recent = deque(maxlen=recent)
+        self.durations = defaultdict(LatencyHistogram)
+        self.errors = defaultdict(int)
+        self.sizes = defaultdict(float)
+        self.outcomes = defaultdict(int)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def span(self, name, **attributes):
+        """Context manager timing one stage: with tracer.span("stt", backend=...) as span"""
+        parent = _current_span.get()
+        span_id = next(self._ids)
+        trace_id = parent.trace_id if parent else span_id
+        return _SpanContext(self, Span(name, trace_id, parent.span_id if parent else None, span_id, attributes))
+
+    def _histogram(self, name):
+        with self._lock:
+            return self.durations[name]
+
+    def _histograms(self):
+        with self._lock:
+            return sorted(self.durations.items())
+
+    def observe(self, name, seconds):
+        """Record a duration that is not a span of its own, such as time to first token"""
+        self._histogram(name).observe(seconds)
+
+    def record(self, span):
+        self._histogram(span.name).observe(span.duration)
+        with self._lock:
+            self.recent.append(span)
+            if span.error:
+                self.errors[span.name] += 1
+            for attribute, value in span.attributes.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    self.outcomes[(span.name, attribute, str(value))] += 1
+                else:
+                    self.sizes[(span.name, attribute)] += value
+
+    def last_trace(self, root=None):
+        """Spans of the most recent trace, or of the latest one with the given root span name"""
+        with self._lock:
+            spans = list(self.recent)
+        roots = [span for span in spans if span.parent_id is None and (root is None or span.name == root)]
+        if not roots:
+            return []
+        trace_id = roots[-1].trace_id
+        return [span for span in spans if span.trace_id == trace_id]
+
+    def summary(self):
+        """Count, p50, p95 and errors per stage, for a quick look"""
+        return {
+            name: {
+                "count": histogram.count,
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+                "errors": self.errors.get(name, 0),
+            }
+            for name, histogram in self._histograms()
+        }
+
+    @staticmethod
+    def _json_histogram(histogram):
+        snapshot = histogram.snapshot()
+        snapshot["buckets"] = [["+Inf" if bound == float("inf") else bound, count] for bound, count in snapshot["buckets"]]
+        return snapshot
+
+    def snapshot(self):
+        """Every aggregate as JSON-serializable data"""
+        with self._lock:
+            sizes = dict(self.sizes)
+            outcomes = dict(self.outcomes)
+            errors = dict(self.errors)
+        return {
+            "time": time.time(),
+            "durations": {
+                name: self._json_histogram(histogram)
+                for name, histogram in self._histograms()
+            },
+            "errors": errors,
+            "sizes": {f"{name}.{attribute}": total for (name, attribute), total in sorted(sizes.items())},
+            "outcomes": {
+                f"{name}.{attribute}={value}": count for (name, attribute, value), count in sorted(outcomes.items())
+            },
+        }
+
+    def prometheus_text(self):
+        """Aggregates in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_duration_seconds Time spent in each pipeline stage",
+            f"# TYPE {METRIC_PREFIX}_span_duration_seconds histogram",
+        ]
+        for name, histogram in self._histograms():
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{METRIC_PREFIX}_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_sum{{span="{name}"}} {snapshot["sum"]}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_count{{span="{name}"}} {snapshot["count"]}')
+
+        with self._lock:
+            errors = sorted(self.errors.items())
+            sizes = sorted(self.sizes.items())
+            outcomes = sorted(self.outcomes.items())
+
+        lines.append(f"# HELP {METRIC_PREFIX}_span_errors_total Spans that failed, raised or handled")
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+        lines.extend(f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {count}' for name, count in errors)
+
+        lines.append(f"# HELP {METRIC_PREFIX}_span_size_total Summed payload sizes such as bytes and tokens")
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_size_total counter")
+        lines.extend(
+            f'{METRIC_PREFIX}_span_size_total{{span="{name}",attribute="{attribute}"}} {total}'
+            for (name, attribute), total in sizes
+        )
+
+        lines.append(f"# HELP {METRIC_PREFIX}_span_outcomes_total Span outcomes such as cache hits and misses")
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_outcomes_total counter")
+        lines.extend(
+            f'{METRIC_PREFIX}_span_outcomes_total{{span="{name}",attribute="{attribute}",value="{value}"}} {count}'
+            for (name, attribute, value), count in outcomes
+        )
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path):
+        """Write the snapshot to path, replacing the previous dump atomically"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as dump_file:
+            json.dump(self.snapshot(), dump_file)
+        os.replace(temp_path, path)
+
+    def start_json_dump(self, path, interval=60):
+        """Dump the snapshot to path every interval seconds from a daemon thread"""
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump_json(path)
+                except OSError:
+                    # Keep dumping even if one write fails, e.g. on a full disk
+                    pass
+
+        thread = threading.Thread(target=_run, name="metrics-dump", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,131 @@
+"""
+TTS audio cache
+Content-addressed cache for synthesized speech, shared across sessions
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def cache_key(text, voice, audio_format):
+    """Hash of everything that determines the synthesized audio"""
+    return hashlib.sha256(f"{voice}\0{audio_format}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Two-tier audio cache: a bounded in-memory LRU in front of an on-disk store.
+
+    Both tiers are limited by total bytes. The disk tier evicts the least
+    recently used files, using their modification time as the access time.
+    """
+
+    def __init__(self, directory, memory_limit=32 * 1024 * 1024, disk_limit=256 * 1024 * 1024):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._disk_size = sum(
+            entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".audio")
+        )
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def get(self, key):
+        """Return cached audio bytes or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as audio_file:
+                audio_data = audio_file.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            self._remember(key, audio_data)
+        return audio_data
+
+    def put(self, key, audio_data):
+        """Store audio bytes in both tiers"""
+        with self._lock:
+            self._remember(key, audio_data)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as audio_file:
+                audio_file.write(audio_data)
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            if not existed:
+                self._disk_size += len(audio_data)
+            if self._disk_size > self.disk_limit:
+                self._evict_disk()
+
+    def get_or_create(self, key, synthesize):
+        """Return cached audio, calling synthesize() and storing its result on a miss"""
+        audio_data = self.get(key)
+        if audio_data is None:
+            audio_data = synthesize()
+            if audio_data:
+                self.put(key, audio_data)
+        return audio_data
+
+    def _remember(self, key, audio_data):
+        """Insert into the memory tier and evict least recently used entries"""
+        if len(audio_data) > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = audio_data
+        self._memory_size += len(audio_data)
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict_disk(self):
+        """Delete the least recently used files until the disk tier fits its limit"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".audio")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        self._disk_size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._disk_size <= self.disk_limit:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                self._disk_size -= size
+            except OSError:
+                pass
+
+    def prewarm(self, items, synthesize):
+        """Synthesize (key, text) pairs that are not cached yet in a background thread"""
+        def _run():
+            for key, text in items:
+                try:
+                    self.get_or_create(key, lambda: synthesize(text))
+                except Exception:
+                    # Pre-warming is best effort; misses are synthesized on demand
+                    pass
+
+        thread = threading.Thread(target=_run, name="tts-cache-prewarm", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,428 @@
+"""
+Voice pipeline
+Speech-to-text, LLM response and text-to-speech, independent of the Streamlit UI
+"""
+
+import contextvars
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_cache import AnswerCache, is_standalone
+from background_loop import BackgroundLoop
+from claude_responses import SAMPLE_RESPONSES
+from context_builder import count_tokens
+from intent_matcher import IntentMatcher
+from model_router import ModelRouter
+from tracing import Tracer, isolated
+from tts_cache import TTSCache, cache_key
+
+# groq, edge_tts and speech_recognition (with numpy) are imported where they
+# are first needed: each adds 0.1-0.4 s to a cold start, and a text-only
+# session answered from the caches never needs them.
+
+# Sentence boundary used to cut the token stream into TTS-sized pieces
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Number of sentences synthesized in parallel while the LLM keeps generating
+TTS_WORKERS = 3
+
+# Use Indian English male voice, at edge-tts's default output format
+TTS_VOICE = "en-GB-RyanNeural"
+TTS_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+# Maximum number of edge-tts syntheses running at once across all sessions
+TTS_MAX_CONCURRENCY = 8
+
+# Shared TTS cache location
+TTS_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ashit_voice_bot_tts")
+
+# Size and lifetime of the answer cache shared by all sessions
+ANSWER_CACHE_ENTRIES = 1000
+ANSWER_CACHE_TTL = 24 * 3600
+
+# Limits shared by every session talking to Groq from this process
+GROQ_MAX_CONCURRENCY = 16
+GROQ_REQUESTS_PER_MINUTE = 30
+GROQ_MAX_RETRIES = 3
+
+# Model used when no ModelRouter is configured
+GROQ_MODEL = "llama-3.1-8b-instant"
+
+# Results of speech_to_text that are error messages rather than transcripts
+STT_ERROR_PREFIXES = ("Sorry, I couldn't understand", "Speech recognition error", "Error processing audio")
+
+
+class ResponseError(Exception):
+    """The LLM could not produce a complete answer; the message is shown to the user"""
+
+
+def split_sentences(chunks):
+    """Regroup a stream of text chunks into complete sentences"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        parts = SENTENCE_END.split(buffer)
+        # Everything but the last part ends on a sentence boundary
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def edge_tts_speech(text):
+    """Collect edge-tts audio chunks for text into memory"""
+    import edge_tts
+
+    communicate = edge_tts.Communicate(text, voice=TTS_VOICE)
+    buffer = io.BytesIO()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            buffer.write(chunk["data"])
+    return buffer.getvalue()
+
+
+def create_pipeline(groq_api_key=None, stt_backend="google", vosk_model_path="model", prewarm_tts_cache=True):
+    """Create the pipeline with the production Groq client, caches and recognizer"""
+    def _groq_client():
+        from groq_pool import SharedGroqClient
+
+        return SharedGroqClient(
+            groq_api_key,
+            max_concurrency=GROQ_MAX_CONCURRENCY,
+            requests_per_minute=GROQ_REQUESTS_PER_MINUTE,
+            max_retries=GROQ_MAX_RETRIES
+        )
+
+    pipeline = VoicePipeline(
+        groq_client_factory=_groq_client if groq_api_key else None,
+        stt_backend=stt_backend,
+        stt_options={"model_path": vosk_model_path} if stt_backend == "vosk" else {},
+        intent_matcher=IntentMatcher(),
+        answer_cache=AnswerCache(max_entries=ANSWER_CACHE_ENTRIES, ttl=ANSWER_CACHE_TTL),
+        tts_cache=TTSCache(TTS_CACHE_DIR),
+        model_router=ModelRouter()
+    )
+    if prewarm_tts_cache:
+        pipeline.prewarm_tts_cache(SAMPLE_RESPONSES.values())
+    return pipeline
+
+
+class VoicePipeline:
+    """STT -> LLM -> TTS shared by every conversation in the process.
+
+    Conversation state (the chat history and its ContextBuilder) is passed
+    in by the caller; everything held here is process-wide: the Groq client,
+    the speech recognizer, the intent matcher, the answer and TTS caches, the
+    model router, the tracer and the event loop that runs speech synthesis.
+    """
+
+    def __init__(self, groq_client=None, groq_client_factory=None, stt_backend="google", stt_options=None,
+                 recognizer=None, intent_matcher=None, answer_cache=None, tts_cache=None,
+                 synthesizer=edge_tts_speech, tts_max_concurrency=TTS_MAX_CONCURRENCY, model_router=None,
+                 tracer=None):
+        self.groq_client_factory = groq_client_factory
+        self.stt_backend = stt_backend
+        self.stt_options = stt_options or {}
+        self.intent_matcher = intent_matcher
+        self.answer_cache = answer_cache
+        self.tts_cache = tts_cache
+        self.model_router = model_router
+        self.tracer = tracer or Tracer()
+        self.synthesizer = synthesizer
+        self.tts_loop = BackgroundLoop(max_concurrency=tts_max_concurrency, name="tts-loop")
+
+        self._groq_client = groq_client
+        self._recognizer = recognizer
+        # Separate locks: loading a Vosk model takes seconds and must not hold up LLM turns
+        self._recognizer_lock = threading.Lock()
+        self._groq_lock = threading.Lock()
+
+    # Speech to text
+
+    @property
+    def recognizer(self):
+        """Speech recognizer, created on first use so a missing backend only fails STT"""
+        from speech_recognizers import create_recognizer
+
+        with self._recognizer_lock:
+            if self._recognizer is None:
+                self._recognizer = create_recognizer(self.stt_backend, **self.stt_options)
+            return self._recognizer
+
+    def speech_to_text(self, audio_bytes):
+        """Convert audio bytes to text using speech recognition"""
+        import speech_recognition as sr
+        from speech_recognizers import prepare_audio
+
+        with self.tracer.span("stt", backend=self.stt_backend, audio_bytes_in=len(audio_bytes)) as span:
+            try:
+                # Decode in memory as trimmed 16 kHz mono before recognition
+                audio_data = prepare_audio(audio_bytes)
+                return self.recognizer.recognize(audio_data)
+            except sr.UnknownValueError:
+                span.set(outcome="not_understood")
+                return "Sorry, I couldn't understand the audio. Please try again."
+            except sr.RequestError as e:
+                span.fail(e)
+                return f"Speech recognition error: {e}"
+            except Exception as e:
+                span.fail(e)
+                return f"Error processing audio: {e}"
+
+    def stream_transcriber(self, on_partial=None):
+        """Transcriber for live 16 kHz mono PCM, ending utterances by voice activity"""
+        from streaming_stt import StreamingTranscriber
+
+        return StreamingTranscriber(self.recognizer, on_partial=on_partial)
+
+    def feed_stream(self, transcriber, pcm):
+        """Feed live audio to a transcriber.
+
+        Returns the transcript, or an error message like speech_to_text,
+        once the utterance has ended; None while the user is still speaking.
+        """
+        import speech_recognition as sr
+
+        try:
+            return transcriber.feed(pcm)
+        except sr.UnknownValueError:
+            return "Sorry, I couldn't understand the audio. Please try again."
+        except sr.RequestError as e:
+            return f"Speech recognition error: {e}"
+        except Exception as e:
+            return f"Error processing audio: {e}"
+
+    # LLM
+
+    @property
+    def groq_client(self):
+        """Groq client, built on first use from groq_client_factory"""
+        with self._groq_lock:
+            if self._groq_client is None and self.groq_client_factory:
+                self._groq_client = self.groq_client_factory()
+            return self._groq_client
+
+    def stream_claude_response(self, user_message, history, context):
+        """Yield response text from Groq as it is generated.
+
+        Raises ResponseError, possibly after part of the answer was yielded,
+        when no complete answer could be generated.
+        """
+        # The llm span stays out of the caller's context, so spans the caller
+        # opens between chunks, like TTS, stay under the turn
+        return isolated(self._stream_claude_response(user_message, history, context))
+
+    def _stream_claude_response(self, user_message, history, context):
+        error = None
+        with self.tracer.span("llm") as span:
+            try:
+                if not self.groq_client:
+                    span.fail("no_api_key")
+                    raise ResponseError("API key not configured. Please add GROQ_API_KEY to Streamlit secrets.")
+
+                messages = context.build(history, user_message)
+                span.set(prompt_tokens=sum(count_tokens(message["content"]) for message in messages))
+
+                if self.model_router:
+                    # Model and length picked per question, with hedging of slow first tokens
+                    chunks = self.model_router.stream(
+                        self.groq_client, user_message, messages, temperature=0.7, top_p=0.9
+                    )
+                else:
+                    # Call Groq API with streaming so text arrives token by token
+                    chunks = self.groq_client.stream(
+                        model=GROQ_MODEL,
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=500,
+                        top_p=0.9
+                    )
+
+                start = time.perf_counter()
+                completion = ""
+                for chunk in chunks:
+                    if not completion:
+                        self.tracer.observe("llm_first_token", time.perf_counter() - start)
+                    completion += chunk
+                    yield chunk
+                span.set(completion_tokens=count_tokens(completion))
+            except ResponseError as e:
+                error = e
+            except Exception as e:
+                span.fail(e)
+                error = ResponseError(f"Error getting response: {e}")
+
+        # Raised outside the span, so it keeps the error that actually happened
+        if error:
+            raise error
+
+    def get_claude_response(self, user_message, history, context):
+        """Get response from Groq API with Ashit's personality; raises ResponseError on failure"""
+        return "".join(self.stream_claude_response(user_message, history, context))
+
+    def lookup_answer(self, user_message):
+        """Answer a question without the LLM, from SAMPLE_RESPONSES or the answer cache.
+
+        Returns the answer and, for cached answers, their audio if the TTS
+        cache still holds it; (None, None) if the LLM has to answer.
+        """
+        with self.tracer.span("answer_lookup") as span:
+            if self.intent_matcher:
+                answer = self.intent_matcher.answer(user_message)
+                if answer:
+                    span.set(source="intent")
+                    return answer, None
+
+            if self.answer_cache and is_standalone(user_message):
+                entry = self.answer_cache.get(user_message)
+                if entry:
+                    audio = None
+                    if self.tts_cache and entry['audio_key']:
+                        audio = self.tts_cache.get(entry['audio_key'])
+                    span.set(source="answer_cache", audio_cached=audio is not None)
+                    return entry['answer'], audio
+
+            span.set(source="miss")
+            return None, None
+
+    def remember_answer(self, user_message, history, context, answer, audio):
+        """Share a complete LLM answer that does not depend on the conversation with other sessions.
+
+        Only answers generated without any earlier turns in the prompt are
+        shared: "what was your role?" reads as standalone, but its answer
+        is about whatever project the conversation was on.
+        """
+        if not self.answer_cache or history or context.summary or not is_standalone(user_message):
+            return
+
+        audio_key = None
+        if self.tts_cache and audio:
+            audio_key = cache_key(answer, TTS_VOICE, TTS_FORMAT)
+            self.tts_cache.put(audio_key, audio)
+        self.answer_cache.put(user_message, answer, audio_key)
+
+    # Text to speech
+
+    def generate_speech(self, text):
+        """Synthesize text on the TTS event loop and return the MP3 bytes"""
+        return self.tts_loop.run(self.synthesizer(text))
+
+    def synthesize_speech(self, text):
+        """Return speech for text from the shared cache, synthesizing it on a miss"""
+        with self.tracer.span("tts", text_chars=len(text)) as span:
+            if not self.tts_cache:
+                audio = self.generate_speech(text)
+            else:
+                def _synthesize():
+                    span.set(cache="miss")
+                    return self.generate_speech(text)
+
+                span.set(cache="hit")
+                audio = self.tts_cache.get_or_create(cache_key(text, TTS_VOICE, TTS_FORMAT), _synthesize)
+            span.set(audio_bytes_out=len(audio or b""))
+            return audio
+
+    def prewarm_tts_cache(self, texts):
+        """Pre-synthesize texts in the background, sentence by sentence as respond() uses them"""
+        sentences = {s for text in texts for s in split_sentences([text])}
+        return self.tts_cache.prewarm(
+            [(cache_key(s, TTS_VOICE, TTS_FORMAT), s) for s in sorted(sentences)],
+            self.generate_speech
+        )
+
+    # Full turn
+
+    def respond(self, user_message, history, context, on_text=None, on_audio=None):
+        """Answer a question and synthesize the answer sentence by sentence.
+
+        Each finished sentence is handed to a TTS worker while the LLM keeps
+        generating, so speech is ready shortly after the last sentence arrives
+        instead of after a full generation plus a full synthesis. on_text is
+        called with the text so far whenever a new chunk arrives, and
+        on_audio with (index, mp3_bytes) for each segment, in order, as soon
+        as it and every segment before it are ready.
+
+        Returns the response text, the MP3 segments joined in order (None if
+        synthesis failed) and the synthesis error, if any.
+        """
+        with self.tracer.span("turn") as span:
+            text, audio, error = self._respond(user_message, history, context, on_text, on_audio)
+            span.set(audio_bytes_out=len(audio or b""))
+            if error:
+                span.fail(error)
+            return text, audio, error
+
+    def _respond(self, user_message, history, context, on_text, on_audio):
+        answer, audio = self.lookup_answer(user_message)
+        if answer and audio:
+            # Cached answer with cached audio: no LLM call and no synthesis
+            if on_text:
+                on_text(answer)
+            if on_audio:
+                on_audio(0, audio)
+            return answer, audio, None
+
+        chunks = [answer] if answer else self.stream_claude_response(user_message, history, context)
+        text = ""
+        segments = []
+        audio_parts = []
+        error = None
+        failed = False
+
+        def _collect(chunks):
+            nonlocal text, failed
+            try:
+                for chunk in chunks:
+                    text += chunk
+                    if on_text:
+                        on_text(text)
+                    yield chunk
+            except ResponseError as e:
+                # Shown and spoken after whatever arrived, but never shared through the answer cache
+                failed = True
+                chunk = f" {e}" if text and not text[-1].isspace() else str(e)
+                text += chunk
+                if on_text:
+                    on_text(text)
+                yield chunk
+
+        def _flush(wait):
+            """Hand over finished segments in order; with wait, block for all of them"""
+            nonlocal error
+            while error is None and len(audio_parts) < len(segments):
+                segment = segments[len(audio_parts)]
+                if not wait and not segment.done():
+                    return
+                try:
+                    audio_parts.append(segment.result())
+                except Exception as e:
+                    error = e
+                    return
+                if on_audio:
+                    on_audio(len(audio_parts) - 1, audio_parts[-1])
+
+        with ThreadPoolExecutor(max_workers=TTS_WORKERS) as pool:
+            for sentence in split_sentences(_collect(chunks)):
+                # After a synthesis error keep reading the text, but stop speaking it
+                if error is None:
+                    # Run in a copy of this context so the TTS span joins the turn's trace
+                    segments.append(pool.submit(contextvars.copy_context().run, self.synthesize_speech, sentence))
+                    _flush(wait=False)
+            _flush(wait=True)
+
+        if error:
+            return text, None, error
+
+        # MP3 frames are self-contained, so segments can be played back to back
+        audio = b"".join(audio_parts) or None
+        if not answer and not failed:
+            self.remember_answer(user_message, history, context, text, audio)
+        return text, audio, None